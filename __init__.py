@@ -1,46 +1,100 @@
 """The surepetcare integration."""
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+from datetime import datetime, timedelta
+import json
 import logging
 from random import choice
-from typing import Any
+import time
+from typing import Any, Callable, Iterable
 
 import async_timeout
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_PASSWORD, CONF_TOKEN, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_PASSWORD, CONF_TOKEN, CONF_URL, CONF_USERNAME
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
-from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 from surepy import Surepy
 from surepy.entities import SurepyEntity
-from surepy.enums import EntityType, Location, LockState
+from surepy.enums import Location, LockState
 from surepy.exceptions import SurePetcareAuthenticationError, SurePetcareError
 import voluptuous as vol
 
 # pylint: disable=import-error
 from .const import (
     ATTR_FLAP_ID,
+    ATTR_HEALTH_INTERVAL,
+    ATTR_HOUSEHOLD_ID,
+    ATTR_LOCAL_TOPIC,
     ATTR_LOCK_STATE,
     ATTR_PET_ID,
+    ATTR_REFRESH_DEBOUNCE,
+    ATTR_SCAN_INTERVAL_MAX,
+    ATTR_SCAN_INTERVAL_MIN,
+    ATTR_VERBOSE_ATTRIBUTES,
     ATTR_VOLTAGE_FULL,
     ATTR_VOLTAGE_LOW,
     ATTR_WHERE,
     DOMAIN,
+    EVENT_LOCK_STATE_SET,
+    FLAP_IDS,
+    OBSERVERS,
+    PET_IDS,
     SERVICE_PET_LOCATION,
     SERVICE_SET_LOCK_STATE,
+    SESSION,
+    SIGNAL_NEW_ENTITIES,
     SPC,
+    STAGGER,
     SURE_API_TIMEOUT,
     SURE_BATT_VOLTAGE_FULL,
     SURE_BATT_VOLTAGE_LOW,
+    SURE_CONFIRM_ATTEMPTS,
+    SURE_CONFIRM_DELAY,
+    SURE_HEALTH_INTERVAL,
+    SURE_LOCAL_TOPIC,
+    SURE_LOCK_CONCURRENCY,
+    SURE_REFRESH_DEBOUNCE,
+    SURE_SCAN_INTERVAL,
+    SURE_SCAN_INTERVAL_MAX,
+    SURE_SCAN_INTERVAL_MIN,
+    SURE_STALE_MAX_AGE,
+    SURE_VERBOSE_ATTRIBUTES,
 )
+from .attributes import project_attributes
+from .auth import TokenManager
+from .breaker import CircuitBreaker
+from .consumption import ConsumptionTracker
+from .derived import DerivedState
+from .devices import DeviceInfoRegistry
+from .endpoints import conflicting_entries, set_base_resource
+from .forecast import BatteryForecast
+from .index import FLAPS, HUB_DEVICES, EntityIndex
+from .metrics import PerformanceMetrics
+from .optimistic import (
+    device_status_resource,
+    lock_mode,
+    pet_position_resource,
+    set_lock_mode,
+    set_position,
+    set_status,
+)
+from .presence import PresenceTracker
+from .ratelimit import Priority, RequestScheduler
+from .refresh import RefreshGate
+from .scheduler import AdaptivePollScheduler, PollStagger
+from .session import ResponseObservers
+from .snapshot import SnapshotStore
+from .sources import MqttHubSource, PushSource
+from .timeline import TimelineSync
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = ["binary_sensor", "device_tracker", "sensor"]
-SCAN_INTERVAL = timedelta(minutes=3)
 
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -66,10 +120,25 @@ CATS = [
 ]
 
 
+def _fingerprint(entity: SurepyEntity) -> int:
+    """Return a hash of the raw data of a surepy entity."""
+    return hash(json.dumps(entity.raw_data(), sort_keys=True, default=str))
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up."""
 
-    hass.data.setdefault(DOMAIN, {})
+    if DOMAIN not in hass.data:
+        observers = ResponseObservers()
+        hass.data[DOMAIN] = {
+            SPC: {},
+            PET_IDS: set(),
+            FLAP_IDS: set(),
+            STAGGER: PollStagger(),
+            OBSERVERS: observers,
+            # one http session for all accounts, reporting the responses to them
+            SESSION: observers.create_session(hass),
+        }
 
     # set option defaults
     if not entry.options:
@@ -78,16 +147,32 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             options={
                 ATTR_VOLTAGE_FULL: SURE_BATT_VOLTAGE_FULL,
                 ATTR_VOLTAGE_LOW: SURE_BATT_VOLTAGE_LOW,
+                ATTR_SCAN_INTERVAL_MIN: SURE_SCAN_INTERVAL_MIN,
+                ATTR_SCAN_INTERVAL_MAX: SURE_SCAN_INTERVAL_MAX,
+                ATTR_HEALTH_INTERVAL: SURE_HEALTH_INTERVAL,
+                ATTR_REFRESH_DEBOUNCE: SURE_REFRESH_DEBOUNCE,
+                ATTR_LOCAL_TOPIC: SURE_LOCAL_TOPIC,
+                ATTR_VERBOSE_ATTRIBUTES: SURE_VERBOSE_ATTRIBUTES,
             },
         )
 
+    # e.g. a local stand-in server for load tests
+    if conflicting_entries(hass, url := entry.data.get(CONF_URL), entry.entry_id):
+        _LOGGER.error(
+            "🐾 \x1b[38;2;255;26;102m·\x1b[0m %s uses another api than the accounts already loaded, not loading it",
+            entry.title,
+        )
+        return False
+
+    set_base_resource(url)
+
     try:
         surepy = Surepy(
             entry.data[CONF_USERNAME],
             entry.data[CONF_PASSWORD],
             auth_token=entry.data[CONF_TOKEN] if CONF_TOKEN in entry.data else None,
             api_timeout=SURE_API_TIMEOUT,
-            session=async_get_clientsession(hass),
+            session=hass.data[DOMAIN][SESSION],
         )
     except SurePetcareAuthenticationError:
         _LOGGER.error(
@@ -102,33 +187,198 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         return False
 
     spc = SurePetcareAPI(hass, entry, surepy)
+    spc.remove_observer = hass.data[DOMAIN][OBSERVERS].add(
+        lambda: spc.tokens.token, spc.observe_response
+    )
+    stagger: PollStagger = hass.data[DOMAIN][STAGGER]
 
     async def async_update_data():
 
-        try:
-            # asyncio.TimeoutError and aiohttp.ClientError already handled
+        if not spc.breaker.allow():
+            # the api is down, keep serving the last data until the next probe
+            spc.coordinator.update_interval = stagger.schedule(
+                entry.entry_id, spc.breaker.retry_in()
+            )
+            if (entities := spc.serve_stale()) is not None:
+                return entities
+            spc.changed_ids = set(spc.fingerprints)
+            raise UpdateFailed("API unavailable, waiting for the next probe")
+
+        spc.metrics.refresh_started()
 
+        async def async_fetch() -> dict[int, SurepyEntity]:
+            # asyncio.TimeoutError and aiohttp.ClientError already handled
             async with async_timeout.timeout(20):
-                return await spc.surepy.get_entities(refresh=True)
+                # overlapping refreshes share the fetch
+                return await spc.refreshes.async_fetch(
+                    lambda: spc.timeline.async_update(spc.coordinator.data)
+                )
+
+        try:
+            try:
+                entities = await async_fetch()
+            except SurePetcareAuthenticationError:
+                # the token expired, log in again before bothering the user
+                # (connection errors of the login go to the outage handling)
+                if not await spc.tokens.async_refresh():
+                    raise
+                entities = await async_fetch()
+
+            # surepy returns nothing instead of raising on some errors (an
+            # unchanged household is rebuilt from the cache, see TimelineSync)
+            if not entities and spc.coordinator.data:
+                raise SurePetcareError("no pets or devices in the api response")
 
         except SurePetcareAuthenticationError as err:
+            spc.metrics.refresh_finished(success=False)
+            spc.changed_ids = set(spc.fingerprints)
             raise ConfigEntryAuthFailed from err
-        except SurePetcareError as err:
-            raise UpdateFailed(f"Error communicating with API: {err}") from err
+        except (asyncio.TimeoutError, SurePetcareError) as err:
+            spc.metrics.refresh_finished(success=False)
+            spc.breaker.failure()
+            spc.coordinator.update_interval = stagger.schedule(
+                entry.entry_id, max(spc.scheduler.failure(), spc.breaker.retry_in())
+            )
+            if (entities := spc.serve_stale()) is not None:
+                return entities
+            # let all entities write their (un)availability
+            spc.changed_ids = set(spc.fingerprints)
+            raise UpdateFailed(f"Error communicating with API: {err!r}") from err
+
+        spc.metrics.refresh_finished(success=True, entity_count=len(entities))
+        spc.tokens.async_persist()
+        spc.breaker.success()
+
+        # entities showing stale data need a fresh write
+        full = not spc.coordinator.last_update_success or spc.stale
+        spc.stale, spc.last_updated = False, dt_util.utcnow()
+
+        changed = spc.track_changes(entities, full=full)
+
+        if changed:
+            spc.snapshot.async_save(entities)
+
+        # poll faster while pets are on the move
+        pet_moved = not spc.index.pet_ids.isdisjoint(changed)
+        interval = spc.scheduler.success(changed=bool(changed), activity=pet_moved)
+
+        # the local hub pushes the movements, the cloud is needed only rarely
+        if any(source.active for source in spc.push_sources):
+            interval = spc.scheduler.interval_max
+
+        # spread the polls of multiple accounts over the interval
+        spc.coordinator.update_interval = stagger.schedule(entry.entry_id, interval)
+
+        return entities
+
+    async def async_update_health():
+
+        # the fast tier runs (and shares) the full sync bringing the device health
+        spc.timeline.invalidate()
+        await spc.coordinator.async_refresh()
 
+        if not spc.coordinator.last_update_success:
+            raise UpdateFailed("No device health without a full sync")
+
+        spc.track_health()
+
+        return spc.coordinator.data
+
+    # fast tier: pet locations and flap lock states, via the timeline
     spc.coordinator = DataUpdateCoordinator(
         hass,
         _LOGGER,
-        name="sureha_sensors",
+        name=f"sureha_sensors_{entry.entry_id}",
         update_method=async_update_data,
-        update_interval=timedelta(seconds=150),
+        update_interval=spc.scheduler.interval,
+    )
+
+    # slow tier: batteries, connectivity and hubs, via full syncs
+    spc.health = DataUpdateCoordinator(
+        hass,
+        _LOGGER,
+        name=f"sureha_health_{entry.entry_id}",
+        update_method=async_update_health,
+        update_interval=spc.health_interval,
     )
 
-    await spc.coordinator.async_config_entry_first_refresh()
+    await spc.presence.async_load()
+    await spc.consumption.async_load()
+    await spc.batteries.async_load()
+
+    warm_start = False
+    if entities := await spc.snapshot.async_load():
+        # start with the snapshot, the cloud gets asked in the background
+        _LOGGER.debug(
+            "🐾 \x1b[38;2;255;26;102m·\x1b[0m warm start with %d entities from snapshot",
+            len(entities),
+        )
+        spc.track_changes(entities, full=True)
+        spc.coordinator.data = entities
+        spc.last_updated = spc.snapshot.saved_at
+        warm_start = True
+    else:
+        await spc.coordinator.async_config_entry_first_refresh()
+
+    spc.track_health()
+    spc.health.data = spc.coordinator.data
+
+    hass.data[DOMAIN][SPC][entry.entry_id] = spc
+
+    spc.tokens.async_schedule_refresh()
+
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
+    if not await spc.async_setup():
+        return False
+
+    if warm_start:
+        # only now, the entities and the listeners picking up new pets/devices
+        # must be set up before the live data arrives
+        hass.async_create_task(spc.coordinator.async_refresh())
+
+    return True
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry to apply its changed options."""
+
+    # also called for the token stored in the entry data
+    spc: SurePetcareAPI | None = hass.data[DOMAIN][SPC].get(entry.entry_id)
+    if spc and entry.options != spc.options:
+        await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload a config entry."""
+
+    if unload_ok := await hass.config_entries.async_unload_platforms(
+        entry, PLATFORMS
+    ):
 
-    hass.data[DOMAIN][SPC] = spc
+        spc: SurePetcareAPI = hass.data[DOMAIN][SPC].pop(entry.entry_id)
+        spc.requests.stop()
+        spc.remove_observer()
+        spc.tokens.stop()
+        for source in spc.push_sources:
+            source.stop()
+        hass.data[DOMAIN][STAGGER].remove(entry.entry_id)
+        hass.data[DOMAIN][PET_IDS].difference_update(spc.pet_ids)
+        hass.data[DOMAIN][FLAP_IDS].difference_update(spc.flap_ids)
 
-    return await spc.async_setup()
+        if not hass.data[DOMAIN][SPC]:
+            hass.services.async_remove(DOMAIN, SERVICE_PET_LOCATION)
+            hass.services.async_remove(DOMAIN, SERVICE_SET_LOCK_STATE)
+
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted data of a config entry."""
+    await SnapshotStore(hass, entry.entry_id).async_remove()
+    await PresenceTracker(hass, entry.entry_id).async_remove()
+    await ConsumptionTracker(hass, entry.entry_id).async_remove()
+    await BatteryForecast(hass, entry.entry_id).async_remove()
 
 
 class SurePetcareAPI:
@@ -140,19 +390,424 @@ class SurePetcareAPI:
         """Initialize the Sure Petcare object."""
 
         self.coordinator: DataUpdateCoordinator
+        self.health: DataUpdateCoordinator
 
         self.hass = hass
         self.config_entry = config_entry
         self.surepy = surepy
 
+        # the options this entry was set up with, changes reload the entry
+        self.options = dict(config_entry.options)
+
+        # seconds it took to set up the platforms and the whole entry
+        self.setup_started = time.monotonic()
+        self.setup_timings: dict[str, float] = {}
+
+        self.scheduler = AdaptivePollScheduler(
+            interval_min=timedelta(
+                seconds=config_entry.options.get(
+                    ATTR_SCAN_INTERVAL_MIN, SURE_SCAN_INTERVAL_MIN
+                )
+            ),
+            interval_max=timedelta(
+                seconds=config_entry.options.get(
+                    ATTR_SCAN_INTERVAL_MAX, SURE_SCAN_INTERVAL_MAX
+                )
+            ),
+            interval=timedelta(seconds=SURE_SCAN_INTERVAL),
+        )
+
+        # last good data, to start without waiting for the cloud
+        self.snapshot = SnapshotStore(hass, config_entry.entry_id)
+
+        # rate limits the api requests, commands go before refreshes
+        self.requests = RequestScheduler()
+        surepy.sac.call = self.requests.limit(surepy.sac.call)  # type: ignore
+        self.remove_observer: Callable[[], None] = lambda: None
+
+        # keeps the api token fresh and stored
+        self.tokens = TokenManager(hass, config_entry, surepy, self.requests)
+
+        self.health_interval = timedelta(
+            seconds=config_entry.options.get(
+                ATTR_HEALTH_INTERVAL, SURE_HEALTH_INTERVAL
+            )
+        )
+
+        # fetches only the new events between the full household syncs, which
+        # the health tier asks for (this only catches the missed ones)
+        self.timeline = TimelineSync(
+            surepy, full_sync_interval=2 * self.health_interval
+        )
+
+        # sources pushing updates in between the polls, e.g. a local hub
+        self.push_sources: list[PushSource] = []
+        if topic := config_entry.options.get(ATTR_LOCAL_TOPIC, SURE_LOCAL_TOPIC):
+            self.push_sources.append(MqttHubSource(hass, topic))
+
         self.states: dict[int, Any] = {}
 
+        # expose the full raw data as attributes instead of a compact subset
+        self.verbose_attributes: bool = config_entry.options.get(
+            ATTR_VERBOSE_ATTRIBUTES, SURE_VERBOSE_ATTRIBUTES
+        )
+
+        # fingerprints of the surepy entities from the last refresh and
+        # the ids of the entities whose data changed with it
+        self.fingerprints: dict[int, int] = {}
+        self.changed_ids: set[int] = set()
+
+        # the same for the health tier: fingerprints at its last update, the ids
+        # changed since then and the full sync and stale state it has seen
+        self.health_fingerprints: dict[int, int] = {}
+        self.health_changed_ids: set[int] = set()
+        self.health_synced: datetime | None = None
+        self.health_stale: bool = False
+
+        # pets/devices added to or removed from the account by the last refresh
+        self.added_ids: set[int] = set()
+        self.removed_ids: set[int] = set()
+
+        # the entities by type, household, ..., rebuilt with every update
+        self.index = EntityIndex()
+
+        # values derived from the entities, recomputed only when they change
+        self.derived = DerivedState(self.attributes)
+
+        # device info shared by all entities of a device
+        self.devices = DeviceInfoRegistry()
+
+        # refresh durations, api latencies, ... for the diagnostic sensors
+        self.metrics = PerformanceMetrics()
+
+        # stops asking the api while it is down
+        self.breaker = CircuitBreaker()
+
+        # the data is served (marked stale) during outages, up to a max age
+        self.stale: bool = False
+        self.last_updated: datetime | None = None
+
+        # merges the refreshes requested by commands and overlapping polls
+        self.refreshes = RefreshGate(
+            self.metrics,
+            debounce=config_entry.options.get(
+                ATTR_REFRESH_DEBOUNCE, SURE_REFRESH_DEBOUNCE
+            ),
+        )
+
+        # time inside/outside and trips of the pets today
+        self.presence = PresenceTracker(hass, config_entry.entry_id)
+
+        # food and water consumed from the feeders and felaquas
+        self.consumption = ConsumptionTracker(hass, config_entry.entry_id)
+
+        # voltage trends for the days until the batteries are low
+        self.batteries = BatteryForecast(hass, config_entry.entry_id)
+
+    @property
+    def pet_ids(self) -> frozenset[int]:
+        """Return the ids of the pets of this account."""
+        return self.index.pet_ids
+
+    @property
+    def flap_ids(self) -> frozenset[int]:
+        """Return the ids of the flaps of this account."""
+        return self.index.flap_ids
+
+    def observe_response(
+        self, url: str, status: int, headers: Any, latency: float
+    ) -> None:
+        """Handle a response of the api to one of our requests."""
+        self.requests.observe(status, headers)
+        self.metrics.observe(url, status, headers, latency)
+
+    @property
+    def stale_attributes(self) -> dict[str, Any]:
+        """Return the attributes marking stale data, empty if the data is fresh."""
+
+        if not self.stale:
+            return {}
+
+        return {
+            "stale": True,
+            "last_updated": self.last_updated.isoformat()
+            if self.last_updated
+            else None,
+        }
+
+    def serve_stale(self) -> dict[int, SurepyEntity] | None:
+        """Return the last data during an outage, None if it is too old."""
+
+        if (
+            not self.coordinator.data
+            or not self.last_updated
+            or dt_util.utcnow() - self.last_updated
+            > timedelta(seconds=SURE_STALE_MAX_AGE)
+        ):
+            return None
+
+        # let all entities write the stale marker once
+        self.changed_ids = set() if self.stale else set(self.fingerprints)
+        self.stale = True
+
+        return self.coordinator.data
+
+    def attributes(self, surepy_entity: SurepyEntity) -> dict[str, Any]:
+        """Return the state attributes of a surepy entity."""
+        return project_attributes(
+            surepy_entity.raw_data(), surepy_entity.type.name, self.verbose_attributes
+        )
+
+    def track_changes(
+        self, entities: dict[int, SurepyEntity], full: bool = False
+    ) -> set[int]:
+        """Fingerprint the entities and collect the ids of the changed ones."""
+
+        fingerprints = {
+            _id: _fingerprint(entity) for _id, entity in entities.items()
+        }
+
+        if full:
+            changed = set(fingerprints)
+        else:
+            changed = {
+                _id
+                for _id, fingerprint in fingerprints.items()
+                if self.fingerprints.get(_id) != fingerprint
+            }
+
+        # entities which vanished from the api count as changed too
+        changed |= self.fingerprints.keys() - fingerprints.keys()
+
+        # an empty response (e.g. of a struggling api) removes nothing
+        if self.fingerprints and fingerprints:
+            self.added_ids |= fingerprints.keys() - self.fingerprints.keys()
+            self.removed_ids |= self.fingerprints.keys() - fingerprints.keys()
+
+        self.fingerprints = fingerprints
+        self.changed_ids = changed
+        self.index = EntityIndex(entities)
+
+        self.derived.invalidate(changed)
+        self.presence.update(entities, changed)
+        self.consumption.update(entities, changed)
+        self.batteries.update(self.index.of_type(*HUB_DEVICES))
+
+        _LOGGER.debug(
+            "🐾 \x1b[38;2;255;26;102m·\x1b[0m %d/%d entities changed",
+            len(changed),
+            len(fingerprints),
+        )
+
+        return changed
+
+    def track_health(self) -> None:
+        """Collect the ids changed since the last update of the health tier."""
+
+        if self.stale != self.health_stale:
+            changed = set(self.fingerprints)
+        else:
+            changed = {
+                _id
+                for _id, fingerprint in self.fingerprints.items()
+                if self.health_fingerprints.get(_id) != fingerprint
+            }
+
+        self.health_fingerprints = dict(self.fingerprints)
+        self.health_changed_ids = changed
+        self.health_synced = self.timeline.last_full_sync
+        self.health_stale = self.stale
+
+    def changed_ids_of(self, coordinator: DataUpdateCoordinator) -> set[int]:
+        """Return the ids changed with the last update of a tier."""
+
+        if coordinator is self.health:
+            return self.health_changed_ids
+
+        return self.changed_ids
+
+    async def async_request_refresh(self) -> None:
+        """Refresh soon, together with the other refreshes requested meanwhile."""
+        await self.refreshes.async_request(self.coordinator.async_refresh)
+
+    @callback
+    def apply(
+        self, _id: int, update: Callable[[dict[str, Any]], None], push: bool = False
+    ) -> bool:
+        """Change the cached raw data of an entity and update its entities."""
+
+        if not self.coordinator.data or not (entity := self.coordinator.data.get(_id)):
+            return False
+
+        update(entity.raw_data())
+
+        if (fingerprint := _fingerprint(entity)) == self.fingerprints.get(_id):
+            return True
+
+        self.fingerprints[_id] = fingerprint
+        self.changed_ids = {_id}
+        self.derived.invalidate({_id})
+        self.presence.update(self.coordinator.data, {_id})
+        self.consumption.update(self.coordinator.data, {_id})
+
+        if push:
+            # pushed data must not postpone the next poll
+            self.coordinator.async_update_listeners()
+        else:
+            self.coordinator.async_set_updated_data(self.coordinator.data)
+
+        # devices may have pushed their health
+        if _id not in self.pet_ids:
+            self.track_health()
+            self.health.async_update_listeners()
+
+        return True
+
+    @callback
+    def _async_sync_health(self) -> None:
+        """Pass full syncs and stale data of the fast tier on to the health tier."""
+
+        if not self.coordinator.data or (
+            self.timeline.last_full_sync == self.health_synced
+            and self.stale == self.health_stale
+        ):
+            return
+
+        self.track_health()
+
+        # a full sync just happened, the health tier may wait for the next one
+        self.health.async_set_updated_data(self.coordinator.data)
+
+    @callback
+    def _async_sync_entities(self) -> None:
+        """Add the entities of new pets/devices, remove those of vanished ones."""
+
+        if not (self.added_ids or self.removed_ids):
+            return
+
+        added, self.added_ids = self.added_ids - self.removed_ids, set()
+        removed, self.removed_ids = self.removed_ids - added, set()
+
+        _LOGGER.info(
+            "🐾 \x1b[38;2;255;26;102m·\x1b[0m %d pets/devices added, %d removed",
+            len(added),
+            len(removed),
+        )
+
+        if added:
+            async_dispatcher_send(
+                self.hass,
+                SIGNAL_NEW_ENTITIES.format(self.config_entry.entry_id),
+                EntityIndex({_id: self.coordinator.data[_id] for _id in added}),
+            )
+
+        if removed:
+            self.async_remove_stale_devices()
+
+        # the service schemas validate against these sets, so update them in place
+        for ids, current in (
+            (self.hass.data[DOMAIN][PET_IDS], self.pet_ids),
+            (self.hass.data[DOMAIN][FLAP_IDS], self.flap_ids),
+        ):
+            ids.difference_update(removed)
+            ids.update(current)
+
+    @callback
+    def async_remove_stale_devices(self) -> None:
+        """Remove the devices (and with them the entities) of vanished ids."""
+
+        if not self.coordinator.data:
+            return
+
+        # the feeder bowls are devices of their own
+        known = {
+            str(_id)
+            for _id in (
+                self.config_entry.entry_id,
+                *self.coordinator.data,
+                *(
+                    f"{feeder_id}{bowl.index}"
+                    for feeder_id, bowls in self.index.bowls.items()
+                    for bowl in bowls
+                ),
+            )
+        }
+
+        registry = dr.async_get(self.hass)
+
+        for device in dr.async_entries_for_config_entry(
+            registry, self.config_entry.entry_id
+        ):
+            if not any(
+                domain == DOMAIN and str(_id) in known
+                for domain, _id in device.identifiers
+            ):
+                _LOGGER.debug(
+                    "🐾 \x1b[38;2;255;26;102m·\x1b[0m removing device %s", device.name
+                )
+                registry.async_remove_device(device.id)
+
+    async def _async_confirm(
+        self,
+        _id: int,
+        resource: str,
+        confirmed: Callable[[dict[str, Any]], bool],
+        rollback: Callable[[dict[str, Any], dict[str, Any]], None],
+    ) -> None:
+        """Poll a single resource until an optimistic update is confirmed."""
+
+        data: dict[str, Any] | None = None
+
+        for _ in range(SURE_CONFIRM_ATTEMPTS):
+
+            await asyncio.sleep(SURE_CONFIRM_DELAY)
+
+            try:
+                with self.requests.prioritized(Priority.COMMAND):
+                    response = await self.surepy.sac.call(
+                        method="GET", resource=resource
+                    )
+            except SurePetcareError as error:
+                _LOGGER.debug("🐾 \x1b[38;2;255;26;102m·\x1b[0m %s", error)
+                continue
+
+            # a 304 (etag matched) returns nothing, use the cached response
+            response = response or self.surepy.sac.resources.get(resource) or {}
+
+            if (data := response.get("data")) is not None and confirmed(data):
+                return
+
+        _LOGGER.warning(
+            "🐾 \x1b[38;2;255;26;102m·\x1b[0m change of %s not confirmed, rolling back",
+            _id,
+        )
+
+        if data:
+            self.apply(_id, lambda raw_data: rollback(raw_data, data))  # type: ignore
+        else:
+            await self.async_request_refresh()
+
     async def set_pet_location(self, pet_id: int, location: Location) -> None:
-        """Update the lock state of a flap."""
+        """Update the location of a pet."""
+
+        with self.requests.prioritized(Priority.COMMAND):
+            response = await self.surepy.sac.set_pet_location(pet_id, location)
 
-        await self.surepy.sac.set_pet_location(pet_id, location)
+        position = (response or {}).get("data") or {"where": int(location.value)}
+        self.apply(pet_id, lambda raw_data: set_position(raw_data, position))
+
+        self.hass.async_create_task(
+            self._async_confirm(
+                pet_id,
+                pet_position_resource(pet_id),
+                lambda data: data.get("where") == int(location.value),
+                set_position,
+            )
+        )
 
-    async def set_lock_state(self, flap_id: int, state: str) -> None:
+    async def set_lock_state(
+        self, flap_id: int, state: str, confirm: bool = True
+    ) -> None:
         """Update the lock state of a flap."""
 
         # https://github.com/PyCQA/pylint/issues/2062
@@ -165,7 +820,88 @@ class SurePetcareAPI:
         }
 
         # elegant functions dict to choose the right function | idea by @janiversen
-        await lock_states[state.lower()](flap_id)
+        with self.requests.prioritized(Priority.COMMAND):
+            await lock_states[state.lower()](flap_id)
+
+        mode = int(LockState[state.upper()].value)
+        self.apply(flap_id, lambda raw_data: set_lock_mode(raw_data, mode))
+
+        if not confirm:
+            return
+
+        # the hub needs a moment to tell the flap, so wait for its status
+        self.hass.async_create_task(
+            self._async_confirm(
+                flap_id,
+                device_status_resource(flap_id),
+                lambda data: lock_mode(data) == mode,
+                set_status,
+            )
+        )
+
+    async def set_lock_states(
+        self, flap_ids: Iterable[int], state: str
+    ) -> dict[int, str]:
+        """Update the lock state of multiple flaps, return the result per flap."""
+
+        flap_ids = list(dict.fromkeys(flap_ids))
+        # a single flap gets its status polled, multiple share one refresh
+        confirm = len(flap_ids) == 1
+
+        semaphore = asyncio.Semaphore(SURE_LOCK_CONCURRENCY)
+
+        async def async_set_lock_state(flap_id: int) -> str:
+            async with semaphore:
+                try:
+                    await self.set_lock_state(flap_id, state, confirm=confirm)
+                except SurePetcareError as error:
+                    _LOGGER.error(
+                        "🐾 \x1b[38;2;255;26;102m·\x1b[0m unable to set the lock state of %s: %s",
+                        flap_id,
+                        error,
+                    )
+                    return str(error)
+            return "ok"
+
+        results = dict(
+            zip(
+                flap_ids,
+                await asyncio.gather(
+                    *[async_set_lock_state(flap_id) for flap_id in flap_ids]
+                ),
+            )
+        )
+
+        changed = [flap_id for flap_id, result in results.items() if result == "ok"]
+
+        if changed and not confirm:
+            mode = int(LockState[state.upper()].value)
+            self.hass.async_create_task(
+                self._async_confirm_lock_modes({flap_id: mode for flap_id in changed})
+            )
+
+        return results
+
+    async def _async_confirm_lock_modes(self, modes: dict[int, int]) -> None:
+        """Confirm the lock modes of multiple flaps with a single refresh."""
+
+        # the hub needs a moment to tell the flaps
+        await asyncio.sleep(SURE_CONFIRM_DELAY)
+
+        # the lock modes only come with a full sync, replacing the optimistic ones
+        self.timeline.invalidate()
+        await self.async_request_refresh()
+
+        if unconfirmed := [
+            flap_id
+            for flap_id, mode in modes.items()
+            if (flap := (self.coordinator.data or {}).get(flap_id))
+            and lock_mode(flap.raw_data()) != mode
+        ]:
+            _LOGGER.warning(
+                "🐾 \x1b[38;2;255;26;102m·\x1b[0m lock state of %s not confirmed",
+                ", ".join(str(flap_id) for flap_id in unconfirmed),
+            )
 
     async def async_setup(self) -> bool:
         """Set up the Sure Petcare integration."""
@@ -179,111 +915,197 @@ class SurePetcareAPI:
         _LOGGER.info(" \x1b[38;2;255;26;102m·\x1b[0m" * 30)
         _LOGGER.info("")
 
-        self.hass.async_add_job(
-            self.hass.config_entries.async_forward_entry_setup(  # type: ignore
-                self.config_entry, "binary_sensor"
+        async def async_forward_entry_setup(platform: str) -> None:
+            started = time.monotonic()
+            await self.hass.config_entries.async_forward_entry_setup(
+                self.config_entry, platform
             )
+            self.setup_timings[platform] = time.monotonic() - started
+
+        await asyncio.gather(
+            *[async_forward_entry_setup(platform) for platform in PLATFORMS]
         )
 
-        self.hass.async_add_job(
-            self.hass.config_entries.async_forward_entry_setup(  # type: ignore
-                self.config_entry, "sensor"
-            )
+        self.setup_timings["total"] = time.monotonic() - self.setup_started
+
+        _LOGGER.debug(
+            "🐾 \x1b[38;2;255;26;102m·\x1b[0m set up in %.3fs | %s",
+            self.setup_timings["total"],
+            " | ".join(
+                f"{platform}: {self.setup_timings[platform]:.3f}s"
+                for platform in PLATFORMS
+            ),
         )
 
-        self.hass.async_add_job(
-            self.hass.config_entries.async_forward_entry_setup(  # type: ignore
-                self.config_entry, "device_tracker"
-            )
+        # the services are shared by all accounts
+        self.hass.data[DOMAIN][PET_IDS].update(self.pet_ids)
+        self.hass.data[DOMAIN][FLAP_IDS].update(self.flap_ids)
+
+        # the health tier needs the data of new devices before their entities
+        self.config_entry.async_on_unload(
+            self.coordinator.async_add_listener(self._async_sync_health)
         )
 
-        surepy_entities: list[SurepyEntity] = self.coordinator.data.values()
-
-        pet_ids = [
-            entity.id for entity in surepy_entities if entity.type == EntityType.PET
-        ]
-
-        pet_location_service_schema = vol.Schema(
-            {
-                vol.Required(ATTR_PET_ID): vol.Any(cv.positive_int, vol.In(pet_ids)),
-                vol.Required(ATTR_WHERE): vol.Any(
-                    cv.string,
-                    vol.In(
-                        [
-                            # https://github.com/PyCQA/pylint/issues/2062
-                            # pylint: disable=no-member
-                            Location.INSIDE.name.title(),
-                            Location.OUTSIDE.name.title(),
-                        ]
-                    ),
-                ),
-            }
+        # pick up new and vanished pets/devices with every refresh
+        self.config_entry.async_on_unload(
+            self.coordinator.async_add_listener(self._async_sync_entities)
         )
+        self.async_remove_stale_devices()
 
-        async def handle_set_pet_location(call: Any) -> None:
-            """Call when setting the lock state."""
+        if not self.hass.services.has_service(DOMAIN, SERVICE_SET_LOCK_STATE):
+            async_register_services(self.hass)
 
-            try:
+        for source in self.push_sources:
+            await source.async_start(
+                lambda _id, update: self.apply(_id, update, push=True)
+            )
+
+        return True
+
+
+def _api_for(hass: HomeAssistant, _id: int) -> SurePetcareAPI | None:
+    """Return the api of the account a pet or device belongs to."""
+
+    spc: SurePetcareAPI
+    for spc in hass.data[DOMAIN][SPC].values():
+        if _id in spc.coordinator.data:
+            return spc
+
+    _LOGGER.error("🐾 \x1b[38;2;255;26;102m·\x1b[0m unknown pet/device id: %s", _id)
+    return None
+
+
+def async_register_services(hass: HomeAssistant) -> None:
+    """Register the services of all accounts."""
 
-                if (pet_id := int(call.data.get(ATTR_PET_ID))) and (
-                    where := str(call.data.get(ATTR_WHERE))
-                ):
+    pet_location_service_schema = vol.Schema(
+        {
+            vol.Required(ATTR_PET_ID): vol.Any(
+                cv.positive_int, vol.In(hass.data[DOMAIN][PET_IDS])
+            ),
+            vol.Required(ATTR_WHERE): vol.Any(
+                cv.string,
+                vol.In(
+                    [
+                        # https://github.com/PyCQA/pylint/issues/2062
+                        # pylint: disable=no-member
+                        Location.INSIDE.name.title(),
+                        Location.OUTSIDE.name.title(),
+                    ]
+                ),
+            ),
+        }
+    )
+
+    async def handle_set_pet_location(call: Any) -> None:
+        """Call when setting the lock state."""
+
+        try:
+
+            if (
+                (pet_id := int(call.data.get(ATTR_PET_ID)))
+                and (where := str(call.data.get(ATTR_WHERE)))
+                and (spc := _api_for(hass, pet_id))
+            ):
+
+                await spc.set_pet_location(pet_id, Location[where.upper()])
+                spc.scheduler.boost()
+
+        except ValueError as error:
+            _LOGGER.error(
+                "🐾 \x1b[38;2;255;26;102m·\x1b[0m arguments of wrong type: %s", error
+            )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PET_LOCATION,
+        handle_set_pet_location,
+        schema=pet_location_service_schema,
+    )
+
+    async def handle_set_lock_state(call: Any) -> None:
+        """Call when setting the lock state."""
+
+        lock_state = call.data.get(ATTR_LOCK_STATE)
+
+        # the flaps to change, grouped by account
+        flaps: dict[SurePetcareAPI, list[int]] = {}
 
-                    await self.set_pet_location(pet_id, Location[where.upper()])
-                    await self.coordinator.async_request_refresh()
+        if (household_id := call.data.get(ATTR_HOUSEHOLD_ID)) is not None:
 
-            except ValueError as error:
+            spc: SurePetcareAPI
+            for spc in hass.data[DOMAIN][SPC].values():
+                if flap_ids := [
+                    flap.id for flap in spc.index.of_household(household_id, *FLAPS)
+                ]:
+                    flaps[spc] = flap_ids
+
+            if not flaps:
                 _LOGGER.error(
-                    "🐾 \x1b[38;2;255;26;102m·\x1b[0m arguments of wrong type: %s", error
+                    "🐾 \x1b[38;2;255;26;102m·\x1b[0m no flaps in household: %s",
+                    household_id,
                 )
 
-        self.hass.services.async_register(
-            DOMAIN,
-            SERVICE_PET_LOCATION,
-            handle_set_pet_location,
-            schema=pet_location_service_schema,
-        )
+        else:
+            for flap_id in call.data.get(ATTR_FLAP_ID, []):
+                if spc := _api_for(hass, flap_id):
+                    flaps.setdefault(spc, []).append(flap_id)
 
-        async def handle_set_lock_state(call: Any) -> None:
-            """Call when setting the lock state."""
-
-            flap_id = call.data.get(ATTR_FLAP_ID)
-            lock_state = call.data.get(ATTR_LOCK_STATE)
-
-            await self.set_lock_state(flap_id, lock_state)
-            await self.coordinator.async_request_refresh()
-
-        flap_ids = [
-            entity.id
-            for entity in surepy_entities
-            if entity.type in [EntityType.CAT_FLAP, EntityType.PET_FLAP]
-        ]
-
-        lock_state_service_schema = vol.Schema(
-            {
-                vol.Required(ATTR_FLAP_ID): vol.All(cv.positive_int, vol.In(flap_ids)),
-                vol.Required(ATTR_LOCK_STATE): vol.All(
-                    cv.string,
-                    vol.Lower,
-                    vol.In(
-                        [
-                            # https://github.com/PyCQA/pylint/issues/2062
-                            # pylint: disable=no-member
-                            LockState.UNLOCKED.name.lower(),
-                            LockState.LOCKED_IN.name.lower(),
-                            LockState.LOCKED_OUT.name.lower(),
-                            LockState.LOCKED_ALL.name.lower(),
-                        ]
-                    ),
-                ),
-            }
-        )
+        async def async_set_lock_states(
+            spc: SurePetcareAPI, flap_ids: list[int]
+        ) -> dict[int, str]:
+            results = await spc.set_lock_states(flap_ids, lock_state)
+            spc.scheduler.boost()
+            return results
 
-        self.hass.services.async_register(
-            DOMAIN,
-            SERVICE_SET_LOCK_STATE,
-            handle_set_lock_state,
-            schema=lock_state_service_schema,
-        )
+        results: dict[int, str] = {}
+        for account_results in await asyncio.gather(
+            *[async_set_lock_states(spc, flap_ids) for spc, flap_ids in flaps.items()]
+        ):
+            results.update(account_results)
 
-        return True
+        if results:
+            hass.bus.async_fire(
+                EVENT_LOCK_STATE_SET,
+                {
+                    ATTR_LOCK_STATE: lock_state,
+                    "results": {
+                        str(flap_id): result for flap_id, result in results.items()
+                    },
+                },
+            )
+
+    lock_state_service_schema = vol.Schema(
+        {
+            # a single flap, a list of flaps or all flaps of a household
+            vol.Exclusive(ATTR_FLAP_ID, "flaps"): vol.All(
+                cv.ensure_list,
+                [vol.All(cv.positive_int, vol.In(hass.data[DOMAIN][FLAP_IDS]))],
+            ),
+            vol.Exclusive(ATTR_HOUSEHOLD_ID, "flaps"): cv.positive_int,
+            vol.Required(ATTR_LOCK_STATE): vol.All(
+                cv.string,
+                vol.Lower,
+                vol.In(
+                    [
+                        # https://github.com/PyCQA/pylint/issues/2062
+                        # pylint: disable=no-member
+                        LockState.UNLOCKED.name.lower(),
+                        LockState.LOCKED_IN.name.lower(),
+                        LockState.LOCKED_OUT.name.lower(),
+                        LockState.LOCKED_ALL.name.lower(),
+                    ]
+                ),
+            ),
+        }
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_LOCK_STATE,
+        handle_set_lock_state,
+        schema=vol.All(
+            lock_state_service_schema,
+            cv.has_at_least_one_key(ATTR_FLAP_ID, ATTR_HOUSEHOLD_ID),
+        ),
+    )
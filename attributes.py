@@ -0,0 +1,86 @@
+"""Compact state attributes of the surepy entities."""
+from __future__ import annotations
+
+from typing import Any
+
+# attribute name -> path into the raw data of a surepy entity
+_COMMON: dict[str, tuple[str, ...]] = {
+    "id": ("id",),
+    "household_id": ("household_id",),
+    "name": ("name",),
+}
+
+_DEVICE: dict[str, tuple[str, ...]] = {
+    **_COMMON,
+    "parent_device_id": ("parent_device_id",),
+    "product_id": ("product_id",),
+    "serial_number": ("serial_number",),
+    "mac_address": ("mac_address",),
+    "online": ("status", "online"),
+    "battery": ("status", "battery"),
+}
+
+_FLAP: dict[str, tuple[str, ...]] = {
+    **_DEVICE,
+    "locking_mode": ("status", "locking", "mode"),
+    "curfew": ("control", "curfew"),
+    "fast_polling": ("control", "fast_polling"),
+}
+
+_FEEDER: dict[str, tuple[str, ...]] = {
+    **_DEVICE,
+    "lid_close_delay": ("control", "lid", "close_delay"),
+    "tare": ("control", "tare"),
+    "training_mode": ("control", "training_mode"),
+}
+
+_HUB: dict[str, tuple[str, ...]] = {
+    **_DEVICE,
+    "led_mode": ("status", "led_mode"),
+    "pairing_mode": ("status", "pairing_mode"),
+}
+
+_PET: dict[str, tuple[str, ...]] = {
+    **_COMMON,
+    "tag_id": ("tag_id",),
+    "gender": ("gender",),
+    "species_id": ("species_id",),
+    "breed_id": ("breed_id",),
+    "photo": ("photo", "location"),
+    "device_id": ("position", "device_id"),
+}
+
+# keyed by the name of the surepy EntityType
+ATTRIBUTES: dict[str, dict[str, tuple[str, ...]]] = {
+    "CAT_FLAP": _FLAP,
+    "PET_FLAP": _FLAP,
+    "FEEDER": _FEEDER,
+    "FEEDER_LITE": _FEEDER,
+    "FELAQUA": _DEVICE,
+    "HUB": _HUB,
+    "PET": _PET,
+}
+
+
+def project_attributes(
+    raw_data: dict[str, Any], entity_type: str, verbose: bool = False
+) -> dict[str, Any]:
+    """Return the whitelisted, flat attributes or a copy of all of them."""
+
+    if verbose:
+        return {**raw_data}
+
+    attrs: dict[str, Any] = {}
+
+    for name, path in ATTRIBUTES.get(entity_type, _COMMON).items():
+
+        value: Any = raw_data
+
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            attrs[name] = value
+
+    return attrs
@@ -0,0 +1,145 @@
+"""Lifecycle of the Sure Petcare api token."""
+from __future__ import annotations
+
+import asyncio
+import base64
+from datetime import datetime, timedelta
+import json
+import logging
+from typing import Any, Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_TOKEN
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+from surepy import Surepy
+from surepy.exceptions import SurePetcareAuthenticationError, SurePetcareError
+
+# pylint: disable=relative-beyond-top-level
+from .const import SURE_TOKEN_REFRESH_MARGIN, SURE_TOKEN_RETRY
+from .ratelimit import Priority, RequestScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def token_expiry(token: str | None) -> datetime | None:
+    """Return the expiry of a (jwt) token, None if unknown."""
+
+    try:
+        payload = str(token).split(".")[1]
+        padding = "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload + padding))
+        return dt_util.utc_from_timestamp(float(claims["exp"]))
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenManager:
+    """Write rotated tokens back to the config entry and refresh them in time."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        surepy: Surepy,
+        requests: RequestScheduler,
+    ) -> None:
+        """Initialize the token manager."""
+
+        self.hass = hass
+        self.config_entry = config_entry
+        self.surepy = surepy
+        self.requests = requests
+
+        self._unsub_refresh: Callable[[], None] | None = None
+
+    @property
+    def token(self) -> str | None:
+        """Return the token surepy currently uses."""
+        # pylint: disable=protected-access
+        return self.surepy.sac._auth_token
+
+    @callback
+    def async_persist(self) -> None:
+        """Store a new token in the config entry."""
+
+        if not (token := self.token) or token == self.config_entry.data.get(
+            CONF_TOKEN
+        ):
+            return
+
+        _LOGGER.debug("🐾 \x1b[38;2;255;26;102m·\x1b[0m storing rotated api token")
+
+        self.hass.config_entries.async_update_entry(
+            self.config_entry, data={**self.config_entry.data, CONF_TOKEN: token}
+        )
+
+        self.async_schedule_refresh()
+
+    @callback
+    def async_schedule_refresh(self) -> None:
+        """Refresh the token before it expires."""
+
+        self.stop()
+
+        if not (expiry := token_expiry(self.token)):
+            return
+
+        now = dt_util.utcnow()
+        margin = min(timedelta(seconds=SURE_TOKEN_REFRESH_MARGIN), (expiry - now) / 2)
+
+        self._unsub_refresh = async_track_point_in_utc_time(
+            self.hass, self._async_scheduled_refresh, max(now, expiry - margin)
+        )
+
+    async def _async_scheduled_refresh(self, _: Any) -> None:
+        self._unsub_refresh = None
+        try:
+            await self.async_refresh()
+        except (asyncio.TimeoutError, SurePetcareError):
+            # already logged, the retry is scheduled
+            pass
+
+    async def async_refresh(self) -> bool:
+        """Log in again to get a new token, False if the credentials are wrong.
+
+        Raises on connection errors and timeouts, after scheduling a retry.
+        """
+
+        try:
+            token = await self.requests.async_run(
+                self.surepy.sac.get_token, Priority.COMMAND
+            )
+        except SurePetcareAuthenticationError:
+            _LOGGER.error(
+                "🐾 \x1b[38;2;255;26;102m·\x1b[0m unable to refresh the api token:"
+                " wrong credentials"
+            )
+            return False
+        except (asyncio.TimeoutError, SurePetcareError) as error:
+            _LOGGER.warning(
+                "🐾 \x1b[38;2;255;26;102m·\x1b[0m unable to refresh the api token,"
+                " retrying in %ds: %s",
+                SURE_TOKEN_RETRY,
+                error,
+            )
+            # the token may still be valid for a while
+            self.stop()
+            self._unsub_refresh = async_track_point_in_utc_time(
+                self.hass,
+                self._async_scheduled_refresh,
+                dt_util.utcnow() + timedelta(seconds=SURE_TOKEN_RETRY),
+            )
+            raise
+
+        if token:
+            self.async_persist()
+
+        return bool(token)
+
+    def stop(self) -> None:
+        """Cancel the scheduled refresh."""
+        if self._unsub_refresh:
+            self._unsub_refresh()
+            self._unsub_refresh = None
@@ -0,0 +1,66 @@
+"""Compare the memory of the compact and the verbose state attributes.
+
+    python -m benchmarks.attribute_memory --scale 100
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tracemalloc
+from typing import Any
+
+from .common import load_module
+from .household import HouseholdSize, build_household, iter_raw_entities
+
+# attribute dicts kept per surepy entity: state, battery and connectivity
+# entities of a device, binary sensor and device tracker of a pet
+COPIES = {"PET": 2, "HUB": 1, "CAT_FLAP": 3, "PET_FLAP": 3, "FEEDER": 3, "FELAQUA": 3}
+
+
+def measure(household: dict[str, Any], verbose: bool) -> dict[str, Any]:
+    """Build the attributes of all entities and measure their size."""
+
+    project_attributes = load_module("attributes").project_attributes
+    raw_entities = iter_raw_entities(household)
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+
+    attributes = [
+        project_attributes(raw_data, entity_type, verbose)
+        for entity_type, raw_data in raw_entities
+        for _ in range(COPIES[entity_type])
+    ]
+
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mode": "verbose" if verbose else "compact",
+        "entities": len(raw_entities),
+        "attribute_sets": len(attributes),
+        "memory_bytes": current - baseline,
+        "peak_bytes": peak - baseline,
+        # what the state machine and the recorder serialize per state write
+        "serialized_bytes": sum(
+            len(json.dumps(attrs, default=str)) for attrs in attributes
+        ),
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=100)
+    args = parser.parse_args()
+
+    household = build_household(HouseholdSize.scaled(args.scale))
+
+    for verbose in (True, False):
+        result = measure(household, verbose)
+        print(json.dumps({"benchmark": "attribute_memory", **result}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Local stand-in for an mqtt broker with a hub bridge publishing to it.
+
+    python -m benchmarks.broker --scale 10 --movement-interval 5
+
+Point the mqtt integration of home assistant to the printed address and set
+the "MQTT topic of a local hub bridge" option of the integration to the topic.
+With the same --scale and --seed, the pets are those of benchmarks.server.
+Only what the integration and the bridges need of mqtt 3.1.1 is implemented:
+qos 0 (qos 1 publishes get acknowledged), retained messages and wildcards.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+import itertools
+import json
+from random import Random
+import struct
+from typing import Any
+
+from .household import HouseholdSize, build_household
+
+DEFAULT_TOPIC = "sureha"
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 8, 9, 10, 11
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+
+
+def matches(topic_filter: str, topic: str) -> bool:
+    """Return True if a topic matches a filter with + and # wildcards."""
+
+    filter_levels, levels = topic_filter.split("/"), topic.split("/")
+
+    for index, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if index >= len(levels) or level not in ("+", levels[index]):
+            return False
+
+    return len(filter_levels) == len(levels)
+
+
+def _string(value: str) -> bytes:
+    encoded = value.encode()
+    return struct.pack("!H", len(encoded)) + encoded
+
+
+def _packet(packet_type: int, flags: int, body: bytes) -> bytes:
+    """Return a packet with the fixed header and its remaining length."""
+
+    header, length = bytearray([packet_type << 4 | flags]), len(body)
+
+    while True:
+        length, digit = divmod(length, 128)
+        header.append(digit | (0x80 if length else 0))
+        if not length:
+            return bytes(header) + body
+
+
+def publish_packet(topic: str, payload: bytes, retain: bool = False) -> bytes:
+    """Return a qos 0 publish packet."""
+    return _packet(PUBLISH, int(retain), _string(topic) + payload)
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, int, bytes]:
+    """Return type, flags and body of the next packet."""
+
+    first = (await reader.readexactly(1))[0]
+
+    length, shift = 0, 0
+    while True:
+        digit = (await reader.readexactly(1))[0]
+        length += (digit & 0x7F) << shift
+        shift += 7
+        if not digit & 0x80:
+            break
+
+    return first >> 4, first & 0x0F, await reader.readexactly(length)
+
+
+def _read_string(body: bytes, offset: int) -> tuple[str, int]:
+    (length,) = struct.unpack_from("!H", body, offset)
+    start = offset + 2
+    return body[start : start + length].decode(), start + length
+
+
+class StandInBroker:
+    """Tiny mqtt broker, reachable over tcp and in-process."""
+
+    def __init__(self) -> None:
+        """Initialize the broker."""
+
+        self.retained: dict[str, bytes] = {}
+        self.published: int = 0
+
+        # tcp clients and in-process subscribers with their topic filters
+        self._clients: dict[asyncio.StreamWriter, set[str]] = {}
+        self._subscribers: dict[int, tuple[str, Callable[[str, Any], None]]] = {}
+        self._ids = itertools.count()
+
+        self._server: asyncio.AbstractServer | None = None
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start listening, return the port."""
+
+        self._server = await asyncio.start_server(self._async_client, host, port)
+        return int(self._server.sockets[0].getsockname()[1])
+
+    async def async_stop(self) -> None:
+        """Disconnect all clients and stop listening."""
+
+        for writer in list(self._clients):
+            writer.close()
+
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def async_subscribe(
+        self, topic_filter: str, received: Callable[[str, Any], None]
+    ) -> Callable[[], None]:
+        """Subscribe in-process, with the signature of the integration's hook."""
+
+        subscription = next(self._ids)
+        self._subscribers[subscription] = (topic_filter, received)
+
+        for topic, payload in list(self.retained.items()):
+            if matches(topic_filter, topic):
+                received(topic, payload)
+
+        def unsubscribe() -> None:
+            self._subscribers.pop(subscription, None)
+
+        return unsubscribe
+
+    def publish(self, topic: str, payload: Any, retain: bool = False) -> None:
+        """Publish a message (dicts as json) to all matching subscribers."""
+
+        if not isinstance(payload, (bytes, str)):
+            payload = json.dumps(payload)
+        if isinstance(payload, str):
+            payload = payload.encode()
+
+        self.published += 1
+
+        if retain:
+            self.retained[topic] = payload
+
+        for topic_filter, received in list(self._subscribers.values()):
+            if matches(topic_filter, topic):
+                received(topic, payload)
+
+        packet = publish_packet(topic, payload)
+        for writer, topic_filters in list(self._clients.items()):
+            if any(matches(topic_filter, topic) for topic_filter in topic_filters):
+                writer.write(packet)
+
+    async def _async_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+
+        self._clients[writer] = set()
+
+        try:
+            while True:
+                packet_type, flags, body = await _read_packet(reader)
+
+                if packet_type == CONNECT:
+                    writer.write(_packet(CONNACK, 0, b"\x00\x00"))
+
+                elif packet_type == PUBLISH:
+                    topic, offset = _read_string(body, 0)
+                    if qos := (flags >> 1) & 0x03:
+                        packet_id = body[offset : offset + 2]
+                        offset += 2
+                        if qos == 1:
+                            writer.write(_packet(PUBACK, 0, packet_id))
+                    self.publish(topic, body[offset:], retain=bool(flags & 0x01))
+
+                elif packet_type == SUBSCRIBE:
+                    packet_id, offset, granted = body[:2], 2, bytearray()
+                    while offset < len(body):
+                        topic_filter, offset = _read_string(body, offset)
+                        offset += 1
+                        self._clients[writer].add(topic_filter)
+                        granted.append(0)
+                    writer.write(_packet(SUBACK, 0, packet_id + bytes(granted)))
+
+                    for topic, payload in list(self.retained.items()):
+                        if any(matches(f, topic) for f in self._clients[writer]):
+                            writer.write(publish_packet(topic, payload, retain=True))
+
+                elif packet_type == UNSUBSCRIBE:
+                    packet_id, offset = body[:2], 2
+                    while offset < len(body):
+                        topic_filter, offset = _read_string(body, offset)
+                        self._clients[writer].discard(topic_filter)
+                    writer.write(_packet(UNSUBACK, 0, packet_id))
+
+                elif packet_type == PINGREQ:
+                    writer.write(_packet(PINGRESP, 0, b""))
+
+                elif packet_type == DISCONNECT:
+                    break
+
+                await writer.drain()
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+
+async def async_publish(
+    host: str, port: int, topic: str, payload: Any, retain: bool = False
+) -> None:
+    """Publish a single message over tcp, like a bridge does."""
+
+    if not isinstance(payload, (bytes, str)):
+        payload = json.dumps(payload)
+    if isinstance(payload, str):
+        payload = payload.encode()
+
+    reader, writer = await asyncio.open_connection(host, port)
+
+    connect = _string("MQTT") + bytes([4, 0x02]) + struct.pack("!H", 60)
+    writer.write(_packet(CONNECT, 0, connect + _string("bench-bridge")))
+    await _read_packet(reader)
+
+    writer.write(publish_packet(topic, payload, retain))
+    writer.write(_packet(DISCONNECT, 0, b""))
+    await writer.drain()
+
+    writer.close()
+    await writer.wait_closed()
+
+
+class HubBridge:
+    """Publishes the movements of the pets of a household, like a local hub."""
+
+    def __init__(
+        self,
+        broker: StandInBroker,
+        household: dict[str, Any],
+        topic: str = DEFAULT_TOPIC,
+        seed: int = 31337,
+    ) -> None:
+        """Initialize the bridge."""
+
+        self.broker = broker
+        self.household = household
+        self.topic = topic
+
+        self._rng = Random(seed)  # nosec
+
+    def move_pet(self) -> tuple[int, int]:
+        """Move a random pet through a flap, return its id and new location."""
+
+        pet = self._rng.choice(self.household["pets"])
+        position = pet.setdefault("position", {})
+        position["where"] = 1 if position.get("where") == 2 else 2
+
+        self.broker.publish(
+            f"{self.topic}/pet/{pet['id']}",
+            {"position": {"where": position["where"]}},
+            retain=True,
+        )
+
+        return pet["id"], position["where"]
+
+    async def async_run(
+        self, interval: float, moved: Callable[[int, int], None] | None = None
+    ) -> None:
+        """Move a pet every interval seconds."""
+
+        while True:
+            await asyncio.sleep(interval)
+            pet_id, where = self.move_pet()
+            if moved:
+                moved(pet_id, where)
+
+
+async def async_serve(args: argparse.Namespace) -> None:
+    """Run the broker and the bridge until interrupted."""
+
+    broker = StandInBroker()
+    bridge = HubBridge(
+        broker,
+        build_household(HouseholdSize.scaled(args.scale), seed=args.seed),
+        topic=args.topic,
+        seed=args.seed,
+    )
+
+    port = await broker.async_start(args.host, args.port)
+    print(f"mqtt broker at {args.host}:{port}, hub bridge publishing to {args.topic}/")
+
+    def moved(pet_id: int, where: int) -> None:
+        print(f"pet {pet_id} -> {'inside' if where == 1 else 'outside'}")
+
+    try:
+        await bridge.async_run(args.movement_interval, moved)
+    finally:
+        await broker.async_stop()
+
+
+def main() -> None:
+    """Run the stand-in broker."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--topic", default=DEFAULT_TOPIC)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=31337)
+    parser.add_argument("--movement-interval", type=float, default=30.0)
+
+    try:
+        asyncio.run(async_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
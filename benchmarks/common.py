@@ -0,0 +1,41 @@
+"""Helpers to load the integration from a source checkout."""
+from __future__ import annotations
+
+import importlib
+import importlib.util
+from pathlib import Path
+import sys
+import types
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "sureha"
+
+
+def load_module(name: str) -> types.ModuleType:
+    """Import a submodule without running the integration's __init__.
+
+    Only works for the modules which do not depend on home assistant.
+    """
+
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(ROOT)]  # type: ignore
+        sys.modules[PACKAGE] = package
+
+    return importlib.import_module(f"{PACKAGE}.{name}")
+
+
+def load_integration() -> types.ModuleType:
+    """Import the integration package, requires home assistant and surepy."""
+
+    if (module := sys.modules.get(PACKAGE)) and getattr(module, "__file__", None):
+        return module
+
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+    )
+    module = importlib.util.module_from_spec(spec)  # type: ignore
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)  # type: ignore
+
+    return module
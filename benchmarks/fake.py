@@ -0,0 +1,108 @@
+"""In-memory stand-in for surepy, serving a synthetic household."""
+from __future__ import annotations
+
+from copy import deepcopy
+import itertools
+from random import Random
+from typing import Any
+
+from .common import load_module
+
+
+class FakeClient:
+    """Minimal SureAPIClient answering from memory."""
+
+    def __init__(self, bench: FakeSurepy) -> None:
+        """Initialize the client."""
+
+        self._bench = bench
+        self._auth_token: str | None = "bench-token"
+        self.resources: dict[str, Any] = {}
+
+    async def get_token(self) -> str | None:
+        """Return the token."""
+        return self._auth_token
+
+    async def call(self, method: str, resource: str, **_: Any) -> dict[str, Any]:
+        """Answer a call, only the timeline is served."""
+
+        if "/timeline/household/" in resource:
+            return {"data": self._bench.timeline_events()}
+
+        return {"data": {}}
+
+    async def set_pet_location(self, pet_id: int, location: Any) -> dict[str, Any]:
+        """Pretend to set the location of a pet."""
+        # one request, like surepy
+        await self.call(method="POST", resource=f"pet/{pet_id}/position")
+        return {"data": {"where": int(location.value)}}
+
+    async def _set_lock(self, device_id: int) -> dict[str, Any]:
+        await self.call(method="PUT", resource=f"device/{device_id}/control")
+        return {"data": {"locking": 0}}
+
+    lock = lock_in = lock_out = unlock = _set_lock
+
+
+class FakeSurepy:
+    """Stand-in for surepy.Surepy, configured through the class attributes."""
+
+    # /me/start data, see household.build_household
+    household: dict[str, Any] = {}
+    # pets moving between two polls
+    movements_per_poll: int = 0
+
+    def __init__(self, *_: Any, **__: Any) -> None:
+        """Initialize the stand-in, the arguments of Surepy are ignored."""
+
+        self.sac = FakeClient(self)
+
+        # like surepy, the entities of all fetches so far
+        self.entities: dict[int, Any] = {}
+
+        self._rng = Random(31337)  # nosec
+        self._event_ids = itertools.count(1)
+
+    async def get_entities(self, refresh: bool = False) -> dict[int, Any]:
+        """Build fresh surepy entities, like a full fetch does.
+
+        Returns the same dict every time, only adding to it like surepy does.
+        """
+
+        entities_from_raw = load_module("snapshot").entities_from_raw
+
+        self.entities.update(
+            entities_from_raw(
+                deepcopy(self.household["devices"] + self.household["pets"])
+            )
+        )
+
+        return self.entities
+
+    def timeline_events(self) -> list[dict[str, Any]]:
+        """Return the movements since the last poll."""
+
+        events = []
+
+        for pet in self._rng.sample(
+            self.household["pets"],
+            min(self.movements_per_poll, len(self.household["pets"])),
+        ):
+            position = pet["position"]
+            position["where"] = 1 if position["where"] == 2 else 2
+
+            events.append(
+                {
+                    "id": next(self._event_ids),
+                    "type": 0,
+                    "movements": [
+                        {
+                            "tag_id": pet["tag_id"],
+                            "device_id": position["device_id"],
+                            "direction": position["where"],
+                        }
+                    ],
+                }
+            )
+
+        return events
@@ -0,0 +1,281 @@
+"""Synthetic Sure Petcare households shaped like the api responses.
+
+The devices also carry the ``lunch`` and ``latest_drink`` data surepy adds from
+the report and timeline endpoints.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from random import Random
+from typing import Any
+
+# product ids of the sure petcare api
+PRODUCT_HUB = 1
+PRODUCT_PET_FLAP = 3
+PRODUCT_FEEDER = 4
+PRODUCT_CAT_FLAP = 6
+PRODUCT_FELAQUA = 8
+
+NAMES = ["thorin", "kobe", "rivendell", "mochi", "pixel", "nala", "felix", "luna"]
+
+
+@dataclass
+class HouseholdSize:
+    """Number of entities per household."""
+
+    households: int = 1
+    pets: int = 2
+    flaps: int = 1
+    feeders: int = 1
+    felaquas: int = 1
+
+    @classmethod
+    def scaled(cls, factor: int) -> HouseholdSize:
+        """Return a household with every entity count multiplied."""
+        return cls(
+            households=max(1, factor // 10),
+            pets=2 * factor,
+            flaps=factor,
+            feeders=factor,
+            felaquas=factor,
+        )
+
+
+def _timestamp(rng: Random) -> str:
+    moment = datetime(2021, 9, 18, tzinfo=timezone.utc) + timedelta(
+        seconds=rng.randrange(86400 * 30)
+    )
+    return moment.isoformat()
+
+
+def _device(
+    rng: Random,
+    _id: int,
+    product_id: int,
+    household_id: int,
+    hub_id: int | None,
+    **extra: Any,
+) -> dict[str, Any]:
+
+    device: dict[str, Any] = {
+        "id": _id,
+        "parent_device_id": hub_id,
+        "product_id": product_id,
+        "household_id": household_id,
+        "name": f"{rng.choice(NAMES)} {_id}",
+        "serial_number": f"H{rng.randrange(10**3):03}-{rng.randrange(10**7):07}",
+        "mac_address": f"{rng.getrandbits(64):016x}",
+        "index": 0,
+        "version": "ODM2",
+        "created_at": _timestamp(rng),
+        "updated_at": _timestamp(rng),
+        "pairing_at": _timestamp(rng),
+        "control": {},
+        "status": {
+            "version": {
+                "device": {"hardware": 6, "firmware": round(rng.uniform(1, 2), 3)}
+            },
+            "battery": round(rng.uniform(4.8, 6.4), 3),
+            "online": True,
+            "signal": {
+                "device_rssi": round(rng.uniform(-90, -30), 2),
+                "hub_rssi": round(rng.uniform(-90, -30), 2),
+            },
+        },
+    }
+
+    if hub_id:
+        device["parent"] = {"id": hub_id, "product_id": PRODUCT_HUB}
+
+    for key, value in extra.items():
+        if isinstance(value, dict) and isinstance(device.get(key), dict):
+            device[key].update(value)
+        else:
+            device[key] = value
+
+    return device
+
+
+def build_household(
+    size: HouseholdSize = HouseholdSize(), seed: int = 31337
+) -> dict[str, Any]:
+    """Return the data of a /me/start response for a synthetic household."""
+
+    rng = Random(seed)  # nosec
+
+    next_id = iter(range(100000, 10**9))
+
+    households: list[dict[str, Any]] = []
+    devices: list[dict[str, Any]] = []
+    pets: list[dict[str, Any]] = []
+
+    for _ in range(size.households):
+
+        household_id = next(next_id)
+        households.append({"id": household_id, "name": f"home {household_id}"})
+
+        hub_id = next(next_id)
+        devices.append(
+            _device(
+                rng,
+                hub_id,
+                PRODUCT_HUB,
+                household_id,
+                None,
+                status={"led_mode": 4, "pairing_mode": 0},
+            )
+        )
+        devices[-1]["status"].pop("battery")
+
+        flaps = []
+        for index in range(size.flaps):
+            flaps.append(
+                _device(
+                    rng,
+                    next(next_id),
+                    PRODUCT_CAT_FLAP if index % 2 else PRODUCT_PET_FLAP,
+                    household_id,
+                    hub_id,
+                    control={
+                        "curfew": [
+                            {
+                                "enabled": True,
+                                "lock_time": "22:00",
+                                "unlock_time": "07:30",
+                            }
+                        ],
+                        "locking": 0,
+                        "fast_polling": False,
+                    },
+                    status={
+                        "locking": {"mode": rng.choice([0, 1, 2, 3])},
+                        "learn_mode": 0,
+                    },
+                )
+            )
+        devices.extend(flaps)
+
+        for _ in range(size.feeders):
+            devices.append(
+                _device(
+                    rng,
+                    next(next_id),
+                    PRODUCT_FEEDER,
+                    household_id,
+                    hub_id,
+                    control={
+                        "lid": {"close_delay": 4},
+                        "bowls": {
+                            "type": 4,
+                            "settings": [
+                                {"food_type": 1, "target": 40},
+                                {"food_type": 2, "target": 40},
+                            ],
+                        },
+                        "tare": 0,
+                        "training_mode": 0,
+                    },
+                    # latest feeding report, added to the raw data by surepy
+                    lunch={
+                        "weights": [
+                            {
+                                "index": index,
+                                "weight": round(rng.uniform(0, 60), 2),
+                                "change": round(-rng.uniform(0, 10), 2),
+                            }
+                            for index in range(2)
+                        ]
+                    },
+                )
+            )
+
+        for _ in range(size.felaquas):
+            devices.append(
+                _device(
+                    rng,
+                    next(next_id),
+                    PRODUCT_FELAQUA,
+                    household_id,
+                    hub_id,
+                    control={"tare": 0},
+                    # latest drinking event, added to the raw data by surepy
+                    latest_drink={
+                        "remaining": round(rng.uniform(0, 450), 2),
+                        "change": round(-rng.uniform(0, 30), 2),
+                        "date": _timestamp(rng),
+                    },
+                )
+            )
+
+        for _ in range(size.pets):
+            pet_id = next(next_id)
+            tag_id = next(next_id)
+            flap = rng.choice(flaps) if flaps else None
+            position = {
+                "tag_id": tag_id,
+                "device_id": flap["id"] if flap else None,
+                "where": rng.choice([1, 2]),
+                "since": _timestamp(rng),
+            }
+            pets.append(
+                {
+                    "id": pet_id,
+                    "name": f"{rng.choice(NAMES)} {pet_id}",
+                    "gender": rng.choice([0, 1]),
+                    "comments": "such a good cute boy",
+                    "household_id": household_id,
+                    "breed_id": rng.randrange(400),
+                    "photo_id": pet_id,
+                    "species_id": 1,
+                    "tag_id": tag_id,
+                    "version": "Mg==",
+                    "created_at": _timestamp(rng),
+                    "updated_at": _timestamp(rng),
+                    "photo": {
+                        "id": pet_id,
+                        "location": (
+                            "https://surehub.s3.amazonaws.com/user-photos/thm/"
+                            f"{pet_id}.jpg"
+                        ),
+                    },
+                    "position": position,
+                    "status": {
+                        "activity": {**position},
+                        "feeding": {
+                            "tag_id": tag_id,
+                            "change": [-rng.uniform(0, 10), 0],
+                            "at": _timestamp(rng),
+                        },
+                        "drinking": {
+                            "tag_id": tag_id,
+                            "change": [-rng.uniform(0, 30)],
+                            "at": _timestamp(rng),
+                        },
+                    },
+                }
+            )
+
+    return {
+        "households": households,
+        "devices": devices,
+        "pets": pets,
+        "user": {"id": 1, "email_address": "cat@example.com"},
+    }
+
+
+ENTITY_TYPES = {
+    PRODUCT_HUB: "HUB",
+    PRODUCT_PET_FLAP: "PET_FLAP",
+    PRODUCT_FEEDER: "FEEDER",
+    PRODUCT_CAT_FLAP: "CAT_FLAP",
+    PRODUCT_FELAQUA: "FELAQUA",
+}
+
+
+def iter_raw_entities(household: dict[str, Any]) -> list[tuple[str, dict[str, Any]]]:
+    """Return (entity type name, raw data) of all entities of a household."""
+
+    return [
+        (ENTITY_TYPES[device["product_id"]], device) for device in household["devices"]
+    ] + [("PET", pet) for pet in household["pets"]]
@@ -0,0 +1,381 @@
+"""Local stand-in for the Sure Petcare api, serving a synthetic household.
+
+    python -m benchmarks.server --scale 10 --latency 0.2 --error-rate 0.05
+
+Set the "API base URL" of the integration (advanced mode) to the printed url.
+The request counters are served as json at /stats.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+from collections import Counter
+from dataclasses import dataclass
+import hashlib
+import itertools
+import json
+from random import Random
+import time
+from typing import Any
+
+from aiohttp import web
+
+from .household import HouseholdSize, build_household
+
+# events per timeline page, like the api
+PAGE_SIZE = 25
+
+
+@dataclass
+class Faults:
+    """Latency and failures injected into the api responses."""
+
+    # seconds, plus up to jitter seconds
+    latency: float = 0.0
+    jitter: float = 0.0
+    # probability of a 500, a 401 and a 429 response
+    error_rate: float = 0.0
+    unauthorized_rate: float = 0.0
+    throttle_rate: float = 0.0
+    # retry-after header of the 429 responses (seconds)
+    retry_after: int = 5
+
+
+def _jwt(claims: dict[str, Any]) -> str:
+    """Return an unsigned jwt, only the claims are read by the integration."""
+
+    def encode(part: dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.bench"
+
+
+def _etag_response(request: web.Request, payload: dict[str, Any]) -> web.Response:
+    """Return json with an etag, or a 304 if it matches the one surepy sends."""
+
+    body = json.dumps(payload)
+    etag = hashlib.sha1(body.encode()).hexdigest()  # nosec
+
+    if request.headers.get("Etag", "").strip('"') == etag:
+        return web.Response(status=304)
+
+    return web.Response(
+        text=body, content_type="application/json", headers={"Etag": f'"{etag}"'}
+    )
+
+
+class StandInServer:
+    """Serve the endpoints surepy uses from an in-memory household."""
+
+    def __init__(
+        self,
+        household: dict[str, Any],
+        faults: Faults | None = None,
+        token_lifetime: int = 3600,
+        movement_interval: float = 0.0,
+        seed: int = 31337,
+    ) -> None:
+        """Initialize the server."""
+
+        self.household = household
+        self.faults = faults or Faults()
+        self.token_lifetime = token_lifetime
+        self.movement_interval = movement_interval
+
+        self.entities: dict[int, dict[str, Any]] = {
+            int(entity["id"]): entity
+            for entity in household["devices"] + household["pets"]
+        }
+        # newest first, like the api
+        self.events: list[dict[str, Any]] = []
+        self.tokens: dict[str, float] = {}
+        self.requests: Counter = Counter()
+        self.responses: Counter = Counter()
+
+        self._rng = Random(seed)  # nosec
+        self._event_ids = itertools.count(1)
+        self._runner: web.AppRunner | None = None
+        self._mover: asyncio.Task | None = None
+
+    def create_app(self) -> web.Application:
+        """Return the aiohttp application."""
+
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post("/api/auth/login", self.login)
+        app.router.add_get("/api/me/start", self.start)
+        app.router.add_get("/api/report/household/{household_id}", self.report)
+        app.router.add_get("/api/timeline/household/{household_id}", self.timeline)
+        app.router.add_get("/api/device/{device_id}", self.device)
+        app.router.add_put("/api/device/{device_id}/control", self.control)
+        app.router.add_get("/api/pet/{pet_id}/position", self.position)
+        app.router.add_post("/api/pet/{pet_id}/position", self.set_position)
+        app.router.add_get("/stats", self.stats)
+
+        return app
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving, return the base url for the integration."""
+
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        if self.movement_interval > 0:
+            self._mover = asyncio.create_task(self._async_move_pets())
+
+        # the real port if a random one was requested
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore
+        return f"http://{host}:{port}/api"
+
+    async def async_stop(self) -> None:
+        """Stop serving."""
+
+        if self._mover:
+            self._mover.cancel()
+
+        if self._runner:
+            await self._runner.cleanup()
+
+    def move_pet(self) -> dict[str, Any] | None:
+        """Let a random pet pass a flap and add the movement to the timeline."""
+
+        if not self.household["pets"]:
+            return None
+
+        pet = self._rng.choice(self.household["pets"])
+        position = pet["position"]
+        position["where"] = 1 if position["where"] == 2 else 2
+        position["since"] = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+        pet["status"]["activity"] = {**position}
+
+        event = {
+            "id": next(self._event_ids),
+            "type": 0,
+            "household_id": pet["household_id"],
+            "created_at": position["since"],
+            "movements": [
+                {
+                    "tag_id": pet["tag_id"],
+                    "device_id": position["device_id"],
+                    "direction": position["where"],
+                    "time": position["since"],
+                }
+            ],
+        }
+        self.events.insert(0, event)
+
+        return event
+
+    async def _async_move_pets(self) -> None:
+        while True:
+            await asyncio.sleep(self.movement_interval)
+            self.move_pet()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> web.Response:
+
+        faults = self.faults
+
+        if faults.latency or faults.jitter:
+            await asyncio.sleep(faults.latency + self._rng.uniform(0, faults.jitter))
+
+        # surepy sends an OPTIONS request before every call
+        if request.method == "OPTIONS":
+            return web.Response(status=204)
+
+        resource = request.match_info.route.resource
+        endpoint = resource.canonical if resource else request.path
+        self.requests[f"{request.method} {endpoint}"] += 1
+
+        # an empty web.Response is falsy, so no "or" here
+        if (fault := self._inject_fault(request)) is not None:
+            response = fault
+        else:
+            response = await handler(request)
+        self.responses[response.status] += 1
+
+        return response
+
+    def _inject_fault(self, request: web.Request) -> web.Response | None:
+
+        if request.path == "/stats":
+            return None
+
+        faults, roll = self.faults, self._rng.random()
+
+        if roll < faults.error_rate:
+            return web.Response(status=500)
+        roll -= faults.error_rate
+
+        if roll < faults.throttle_rate:
+            return web.Response(
+                status=429, headers={"Retry-After": str(faults.retry_after)}
+            )
+        roll -= faults.throttle_rate
+
+        if request.path == "/api/auth/login":
+            return None
+
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if roll < faults.unauthorized_rate or self.tokens.get(token, 0) < time.time():
+            return web.Response(status=401)
+
+        return None
+
+    async def login(self, request: web.Request) -> web.Response:
+        """Issue a token for any credentials except the password "wrong"."""
+
+        form = await request.post()
+
+        if form.get("password") == "wrong":
+            return web.Response(status=401)
+
+        expires = int(time.time()) + self.token_lifetime
+        token = _jwt({"sub": str(form.get("email_address")), "exp": expires})
+        self.tokens[token] = expires
+
+        return web.json_response({"data": {"token": token, "user": {}}})
+
+    async def start(self, request: web.Request) -> web.Response:
+        """Return the whole household, honoring the etag surepy sends."""
+        return _etag_response(request, {"data": self.household})
+
+    async def report(self, request: web.Request) -> web.Response:
+        """Return no per pet reports, the household already carries the data."""
+        return web.json_response({"data": []})
+
+    async def timeline(self, request: web.Request) -> web.Response:
+        """Return a page of the household timeline, newest first."""
+
+        household_id = int(request.match_info["household_id"])
+        since_id = int(request.query.get("since_id", 0))
+        page = max(1, int(request.query.get("page", 1)))
+
+        events = [
+            event
+            for event in self.events
+            if event["household_id"] == household_id and event["id"] > since_id
+        ]
+
+        return _etag_response(
+            request, {"data": events[(page - 1) * PAGE_SIZE : page * PAGE_SIZE]}
+        )
+
+    async def device(self, request: web.Request) -> web.Response:
+        """Return a single device."""
+
+        if (device := self.entities.get(int(request.match_info["device_id"]))) is None:
+            return web.Response(status=404)
+
+        return web.json_response({"data": device})
+
+    async def control(self, request: web.Request) -> web.Response:
+        """Change the control settings of a device, e.g. the lock mode of a flap."""
+
+        if (device := self.entities.get(int(request.match_info["device_id"]))) is None:
+            return web.Response(status=404)
+
+        form = await request.post()
+        control = device.setdefault("control", {})
+
+        for key, value in form.items():
+            control[key] = int(value) if str(value).isdigit() else value
+
+        if "locking" in control:
+            device.setdefault("status", {}).setdefault("locking", {})["mode"] = control[
+                "locking"
+            ]
+
+        return web.json_response({"data": control})
+
+    async def position(self, request: web.Request) -> web.Response:
+        """Return the position of a pet."""
+
+        if (pet := self.entities.get(int(request.match_info["pet_id"]))) is None:
+            return web.Response(status=404)
+
+        return web.json_response({"data": pet.get("position", {})})
+
+    async def set_position(self, request: web.Request) -> web.Response:
+        """Set the position of a pet."""
+
+        if (pet := self.entities.get(int(request.match_info["pet_id"]))) is None:
+            return web.Response(status=404)
+
+        form = await request.post()
+        position = pet.setdefault("position", {})
+        position.update(
+            where=int(str(form.get("where", position.get("where", 1)))),
+            since=form.get("since", position.get("since")),
+        )
+        pet.setdefault("status", {})["activity"] = {**position}
+
+        return web.json_response({"data": position})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        """Return the request and response counters."""
+        return web.json_response(
+            {
+                "requests": dict(self.requests),
+                "responses": {str(status): n for status, n in self.responses.items()},
+                "events": len(self.events),
+            }
+        )
+
+
+async def async_serve(args: argparse.Namespace) -> None:
+    """Run the server until interrupted."""
+
+    server = StandInServer(
+        build_household(HouseholdSize.scaled(args.scale), seed=args.seed),
+        Faults(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            unauthorized_rate=args.unauthorized_rate,
+            throttle_rate=args.throttle_rate,
+            retry_after=args.retry_after,
+        ),
+        token_lifetime=args.token_lifetime,
+        movement_interval=args.movement_interval,
+        seed=args.seed,
+    )
+
+    base_url = await server.async_start(args.host, args.port)
+    print(f"serving the sure petcare api at {base_url}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.async_stop()
+
+
+def main() -> None:
+    """Run the stand-in server."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=31337)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=5)
+    parser.add_argument("--token-lifetime", type=int, default=3600)
+    parser.add_argument("--movement-interval", type=float, default=30.0)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(async_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
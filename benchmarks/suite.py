@@ -0,0 +1,319 @@
+"""Setup, refresh and state write cost of the integration on synthetic households.
+
+Needs home assistant and surepy:
+
+    python -m benchmarks.suite --scales 1 10 100 --output bench_output.txt
+
+With --server, surepy talks http to the local stand-in api instead of answering
+from memory, optionally with injected latency and failures. With --pushes, pet
+movements are published over tcp to the stand-in mqtt broker after the refreshes
+to measure the latency of the local hub source.
+
+Every result is one json line, to compare runs across versions.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+import functools
+import importlib
+import json
+from pathlib import Path
+import subprocess  # nosec
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+
+from .broker import StandInBroker, async_publish
+from .common import ROOT, load_integration
+from .fake import FakeSurepy
+from .household import HouseholdSize, build_household
+from .server import Faults, StandInServer
+
+# properties home assistant reads on every state write
+PROPERTIES = [
+    "available",
+    "state",
+    "is_on",
+    "extra_state_attributes",
+    "device_info",
+    "location_name",
+]
+
+# seconds to wait for the state write of a pushed movement
+PUSH_TIMEOUT = 5.0
+
+
+def _revision() -> str:
+    try:
+        return subprocess.run(  # nosec
+            ["git", "describe", "--always", "--dirty"],
+            cwd=ROOT,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def _async_create_hass(config_dir: str) -> Any:
+
+    # pylint: disable=import-outside-toplevel
+    from homeassistant import config_entries
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers import device_registry, entity_registry
+
+    hass = HomeAssistant()  # type: ignore
+    hass.config.config_dir = config_dir
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+
+    # the integration removes the devices of vanished pets/devices
+    await device_registry.async_load(hass)
+    await entity_registry.async_load(hass)
+
+    return hass
+
+
+async def async_benchmark(
+    size: HouseholdSize,
+    refreshes: int,
+    movements: int,
+    faults: Faults | None = None,
+    pushes: int = 0,
+) -> dict:
+    """Set up the integration with a synthetic household and measure it.
+
+    Uses the local stand-in api if faults are given, the in-memory fake otherwise.
+    Pushes pet movements through the stand-in mqtt broker if pushes are given.
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.const import CONF_PASSWORD, CONF_URL, CONF_USERNAME
+    from surepy import Surepy
+
+    integration = load_integration()
+    data = {CONF_USERNAME: "cat@example.com", CONF_PASSWORD: "meow"}
+    server: StandInServer | None = None
+    broker: StandInBroker | None = None
+    options: dict[str, Any] = {}
+
+    if faults:
+        integration.Surepy = Surepy
+        server = StandInServer(build_household(size), faults)
+        data[CONF_URL] = await server.async_start()
+    else:
+        integration.Surepy = FakeSurepy
+        FakeSurepy.household = build_household(size)
+        FakeSurepy.movements_per_poll = movements
+
+    if pushes:
+        broker = StandInBroker()
+        broker_port = await broker.async_start()
+        # the integration subscribes in-process, the "bridge" publishes over tcp
+        integration.MqttHubSource = functools.partial(
+            importlib.import_module(f"{integration.__name__}.sources").MqttHubSource,
+            subscribe=broker.async_subscribe,
+        )
+        options[integration.ATTR_LOCAL_TOPIC] = "sureha"
+
+    state_writes: Counter = Counter()
+    entities: list[Any] = []
+
+    with tempfile.TemporaryDirectory() as config_dir:
+
+        hass = await _async_create_hass(config_dir)
+
+        entry = ConfigEntry(
+            version=1,
+            domain=integration.DOMAIN,
+            title="benchmark",
+            data=data,
+            source="user",
+            options=options,
+        )
+        # pylint: disable=protected-access
+        hass.config_entries._entries[entry.entry_id] = entry
+
+        async def async_forward_entry_setup(_: Any, platform: str) -> bool:
+
+            module = importlib.import_module(f"{integration.__name__}.{platform}")
+
+            def add_entities(new_entities: list[Any], *_: Any) -> None:
+                for entity in new_entities:
+                    entity.hass = hass
+                    entity.entity_id = f"{platform}.bench_{len(entities)}"
+                    # count the writes instead of writing to the state machine
+                    entity.async_write_ha_state = (
+                        lambda entity=entity: state_writes.update(
+                            [type(entity).__name__]
+                        )
+                    )
+                    entities.append(entity)
+
+            await module.async_setup_entry(hass, entry, add_entities)
+
+            return True
+
+        hass.config_entries.async_forward_entry_setup = async_forward_entry_setup
+
+        tracemalloc.start()
+
+        started = time.perf_counter()
+        await integration.async_setup_entry(hass, entry)
+        setup_seconds = time.perf_counter() - started
+
+        for entity in entities:
+            await entity.async_added_to_hass()
+
+        spc = hass.data[integration.DOMAIN][integration.SPC][entry.entry_id]
+        # no rate limit for the benchmark
+        spc.requests.rate = 1e9
+
+        refresh_cpu, refresh_seconds = [], []
+        failures_before = spc.metrics.failures
+        for _ in range(refreshes):
+
+            if server:
+                for _ in range(movements):
+                    server.move_pet()
+
+            started, started_cpu = time.perf_counter(), time.process_time()
+            await spc.coordinator.async_refresh()
+            refresh_cpu.append(time.process_time() - started_cpu)
+            refresh_seconds.append(time.perf_counter() - started)
+
+        # stale data is served during outages, count the failures themselves
+        failed_refreshes = spc.metrics.failures - failures_before
+
+        push_seconds = []
+        if broker:
+            pets = [spc.coordinator.data[_id] for _id in spc.index.pet_ids]
+            for index in range(pushes if pets else 0):
+
+                pet = pets[index % len(pets)]
+                position = pet.raw_data().get("position", {})
+                where = 1 if position.get("where") == 2 else 2
+                writes = state_writes["Pet"]
+
+                started = time.perf_counter()
+                await async_publish(
+                    "127.0.0.1",
+                    broker_port,
+                    f"sureha/pet/{pet.id}",
+                    {"position": {"where": where}},
+                )
+                while state_writes["Pet"] == writes:
+                    if time.perf_counter() - started > PUSH_TIMEOUT:
+                        break
+                    await asyncio.sleep(0)
+                push_seconds.append(time.perf_counter() - started)
+
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        property_seconds: dict[str, float] = defaultdict(float)
+        property_counts: Counter = Counter()
+        for entity in entities:
+            started = time.perf_counter()
+            for name in PROPERTIES:
+                getattr(entity, name, None)
+            property_seconds[type(entity).__name__] += time.perf_counter() - started
+            property_counts[type(entity).__name__] += 1
+
+        metrics = spc.metrics.as_dict()
+
+        spc.requests.stop()
+        spc.tokens.stop()
+        await hass.async_stop(force=True)
+
+        if server:
+            await server.async_stop()
+        if broker:
+            await broker.async_stop()
+
+    return {
+        "size": size.__dict__,
+        "surepy_entities": len(spc.coordinator.data),
+        "entities": len(entities),
+        "setup_seconds": setup_seconds,
+        "platform_setup_seconds": spc.setup_timings,
+        "refresh_cpu_seconds": {
+            "mean": sum(refresh_cpu) / len(refresh_cpu) if refresh_cpu else None,
+            "max": max(refresh_cpu, default=None),
+        },
+        "refresh_seconds": {
+            "mean": sum(refresh_seconds) / len(refresh_seconds)
+            if refresh_seconds
+            else None,
+            "max": max(refresh_seconds, default=None),
+        },
+        "failed_refreshes": failed_refreshes,
+        "push_latency_seconds": {
+            "mean": sum(push_seconds) / len(push_seconds) if push_seconds else None,
+            "max": max(push_seconds, default=None),
+        },
+        "state_writes": sum(state_writes.values()),
+        "state_writes_per_refresh": sum(state_writes.values()) / max(refreshes, 1),
+        "property_microseconds": {
+            name: property_seconds[name] / property_counts[name] * 1e6
+            for name in property_counts
+        },
+        "peak_memory_bytes": peak_memory,
+        "server_requests": dict(server.requests) if server else None,
+        "metrics": metrics,
+    }
+
+
+def main() -> None:
+    """Run the benchmark suite."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--refreshes", type=int, default=5)
+    parser.add_argument("--movements", type=int, default=1)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--server", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--pushes", type=int, default=0)
+    args = parser.parse_args()
+
+    revision = _revision()
+    faults = (
+        Faults(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+        )
+        if args.server
+        else None
+    )
+
+    for scale in args.scales:
+
+        result = asyncio.run(
+            async_benchmark(
+                HouseholdSize.scaled(scale),
+                args.refreshes,
+                args.movements,
+                faults,
+                args.pushes,
+            )
+        )
+        line = json.dumps(
+            {"benchmark": "suite", "revision": revision, "scale": scale, **result}
+        )
+
+        print(line)
+        if args.output:
+            with args.output.open("a", encoding="utf-8") as output:
+                output.write(f"{line}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,16 +9,18 @@ from homeassistant.components.binary_sensor import (
     BinarySensorEntity,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from surepy.entities import SurepyEntity
 from surepy.entities.devices import Hub as SureHub, SurepyDevice
 from surepy.entities.pet import Pet as SurePet
-from surepy.enums import EntityType, Location
+from surepy.enums import EntityType
 
 # pylint: disable=relative-beyond-top-level
 from . import SurePetcareAPI
-from .const import DOMAIN, SPC, SURE_MANUFACTURER
+from .const import DOMAIN, SIGNAL_NEW_ENTITIES, SPC
+from .index import HUB_DEVICES, EntityIndex
 
 PARALLEL_UPDATES = 2
 
@@ -38,28 +40,40 @@ async def async_setup_entry(
 ) -> None:
     """Set up config entry Sure PetCare Flaps sensors."""
 
-    entities: list[SurePetcareBinarySensor] = []
+    spc: SurePetcareAPI = hass.data[DOMAIN][SPC][config_entry.entry_id]
+
+    @callback
+    def async_add_new(index: EntityIndex) -> None:
+        """Add the binary sensors of pets/devices new to the account."""
+        async_add_entities(_entities(spc, index))
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_NEW_ENTITIES.format(config_entry.entry_id), async_add_new
+        )
+    )
 
-    spc: SurePetcareAPI = hass.data[DOMAIN][SPC]
+    async_add_entities(_entities(spc, spc.index))
 
-    for surepy_entity in spc.coordinator.data.values():
 
-        if surepy_entity.type == EntityType.PET:
-            entities.append(Pet(spc.coordinator, surepy_entity.id, spc))
+def _entities(
+    spc: SurePetcareAPI, index: EntityIndex
+) -> list[SurePetcareBinarySensor]:
+    """Return the binary sensors of the indexed pets and devices."""
 
-        elif surepy_entity.type == EntityType.HUB:
-            entities.append(Hub(spc.coordinator, surepy_entity.id, spc))
+    entities: list[SurePetcareBinarySensor] = []
+
+    for pet in index.of_type(EntityType.PET):
+        entities.append(Pet(spc.coordinator, pet.id, spc))
 
-        # connectivity
-        elif surepy_entity.type in [
-            EntityType.CAT_FLAP,
-            EntityType.PET_FLAP,
-            EntityType.FEEDER,
-            EntityType.FELAQUA,
-        ]:
-            entities.append(DeviceConnectivity(spc.coordinator, surepy_entity.id, spc))
+    for hub in index.of_type(EntityType.HUB):
+        entities.append(Hub(spc.health, hub.id, spc))
 
-    async_add_entities(entities, True)
+    # connectivity
+    for device in index.of_type(*HUB_DEVICES):
+        entities.append(DeviceConnectivity(spc.health, device.id, spc))
+
+    return entities
 
 
 class SurePetcareBinarySensor(CoordinatorEntity, BinarySensorEntity):
@@ -80,6 +94,9 @@ class SurePetcareBinarySensor(CoordinatorEntity, BinarySensorEntity):
         self._id: int = _id
         self._spc: SurePetcareAPI = spc
 
+        # id of the surepy entity this entity gets its data from
+        self._surepy_id: int = _id
+
         self._coordinator = coordinator
 
         self._surepy_entity: SurepyEntity = self._coordinator.data[self._id]
@@ -102,48 +119,37 @@ class SurePetcareBinarySensor(CoordinatorEntity, BinarySensorEntity):
         self._attr_unique_id = f"{self._surepy_entity.household_id}-{self._id}"
 
         if self._state:
-            self._attr_extra_state_attributes = {**self._surepy_entity.raw_data()}
+            self._attr_extra_state_attributes = self._spc.attributes(
+                self._surepy_entity
+            )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if the surepy entity changed."""
+        # entities of a vanished pet/device wait for their removal
+        if (
+            self._surepy_id in self._spc.changed_ids_of(self.coordinator)
+            and self._surepy_id in self.coordinator.data
+        ):
+            self._spc.metrics.state_written()
+            super()._handle_coordinator_update()
 
     @property
-    def device_info(self):
-
-        device = {}
-
-        try:
-
-            model = f"{self._surepy_entity.type.name.replace('_', ' ').title()}"
-            if serial := self._surepy_entity.raw_data().get("serial_number"):
-                model = f"{model} ({serial})"
-            elif mac_address := self._surepy_entity.raw_data().get("mac_address"):
-                model = f"{model} ({mac_address})"
-            elif tag_id := self._surepy_entity.raw_data().get("tag_id"):
-                model = f"{model} ({tag_id})"
-
-            device = {
-                "identifiers": {(DOMAIN, self._id)},
-                "name": self._surepy_entity.name.capitalize(),
-                "manufacturer": SURE_MANUFACTURER,
-                "model": model,
-            }
-
-            if self._state:
-                versions = self._state.get("version", {})
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the attributes, marked if the data is stale."""
+        return {
+            **(getattr(self, "_attr_extra_state_attributes", None) or {}),
+            **self._spc.stale_attributes,
+        }
 
-                if dev_fw_version := versions.get("device", {}).get("firmware"):
-                    device["sw_version"] = dev_fw_version
-
-                if (lcd_version := versions.get("lcd", {})) and (
-                    rf_version := versions.get("rf", {})
-                ):
-                    device["sw_version"] = (
-                        f"lcd: {lcd_version.get('version', lcd_version)['firmware']} | "
-                        f"fw: {rf_version.get('version', rf_version)['firmware']}"
-                    )
-
-        except AttributeError:
-            pass
-
-        return device
+    @property
+    def device_info(self):
+        """Return the device info, shared by all entities of a device."""
+        # the current data, e.g. with a new firmware version
+        surepy_entity = self._coordinator.data.get(self._surepy_id, self._surepy_entity)
+        return self._spc.devices.device_info(
+            self._id, surepy_entity, surepy_entity.raw_data().get("status")
+        )
 
 
 class Hub(SurePetcareBinarySensor):
@@ -199,14 +205,9 @@ class Pet(SurePetcareBinarySensor):
         attrs: dict[str, Any] = {}
 
         if pet := self._coordinator.data[self._id]:
+            attrs = self._spc.derived.pet(pet).attributes
 
-            attrs = {
-                "since": pet.location.since,
-                "where": pet.location.where,
-                **pet.raw_data(),
-            }
-
-        return attrs
+        return {**attrs, **self._spc.stale_attributes}
 
     @property
     def is_on(self) -> bool:
@@ -216,7 +217,7 @@ class Pet(SurePetcareBinarySensor):
         inside: bool = False
 
         if pet := self._coordinator.data[self._id]:
-            inside = bool(pet.location.where == Location.INSIDE)
+            inside = self._spc.derived.pet(pet).inside
 
         return inside
 
@@ -241,17 +242,18 @@ class DeviceConnectivity(SurePetcareBinarySensor):
         device: SurepyDevice
         attrs: dict[str, Any] = {}
 
-        if (device := self._coordinator.data[self._id]) and (
-            state := device.raw_data().get("status")
-        ):
-            attrs = {
-                "device_rssi": f'{state["signal"]["device_rssi"]:.2f}',
-                "hub_rssi": f'{state["signal"]["hub_rssi"]:.2f}',
-            }
+        if device := self._coordinator.data[self._id]:
+            attrs = self._spc.derived.connectivity(device)
 
-        return attrs
+        return {**attrs, **self._spc.stale_attributes}
 
     @property
     def is_on(self) -> bool:
-        """Return True if the pet is at home."""
-        return bool(self.extra_state_attributes)
+        """Return True if the device is connected."""
+
+        device: SurepyDevice
+
+        if device := self._coordinator.data[self._id]:
+            return bool(self._spc.derived.connectivity(device))
+
+        return False
@@ -0,0 +1,109 @@
+"""Circuit breaker in front of the Sure Petcare api."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import logging
+from random import uniform
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+# pylint: disable=relative-beyond-top-level
+from .const import (
+    SURE_BREAKER_BACKOFF,
+    SURE_BREAKER_BACKOFF_MAX,
+    SURE_BREAKER_THRESHOLD,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop asking a failing api, probe it with an exponential backoff instead."""
+
+    def __init__(
+        self,
+        threshold: int = SURE_BREAKER_THRESHOLD,
+        backoff: timedelta = timedelta(seconds=SURE_BREAKER_BACKOFF),
+        backoff_max: timedelta = timedelta(seconds=SURE_BREAKER_BACKOFF_MAX),
+    ) -> None:
+        """Initialize the breaker."""
+
+        self.threshold = threshold
+        self.backoff = backoff
+        self.backoff_max = max(backoff, backoff_max)
+
+        # consecutive failures and the time of the next probe if open
+        self.failures: int = 0
+        self.retry_at: datetime | None = None
+
+    @property
+    def state(self) -> str:
+        """Return the state of the breaker."""
+
+        if self.retry_at is None:
+            return CLOSED
+
+        return OPEN if dt_util.utcnow() < self.retry_at else HALF_OPEN
+
+    def allow(self) -> bool:
+        """Return True if the api may be asked, i.e. closed or time to probe."""
+        return self.state != OPEN
+
+    def retry_in(self) -> timedelta:
+        """Return the time until the next probe, zero if closed."""
+
+        if self.retry_at is None:
+            return timedelta(0)
+
+        return max(timedelta(0), self.retry_at - dt_util.utcnow())
+
+    def success(self) -> None:
+        """Close the breaker."""
+
+        if self.retry_at is not None:
+            _LOGGER.info(
+                "🐾 \x1b[38;2;255;26;102m·\x1b[0m api is back after %d failures",
+                self.failures,
+            )
+
+        self.failures = 0
+        self.retry_at = None
+
+    def failure(self) -> None:
+        """Count a failure, open the breaker after too many in a row."""
+
+        self.failures += 1
+
+        if self.failures < self.threshold:
+            return
+
+        backoff = min(
+            self.backoff_max,
+            self.backoff * 2 ** min(self.failures - self.threshold, 16),
+        )
+
+        # jitter to not probe in lockstep with everyone else
+        self.retry_at = dt_util.utcnow() + timedelta(
+            seconds=uniform(  # nosec
+                backoff.total_seconds() / 2, backoff.total_seconds()
+            )
+        )
+
+        _LOGGER.warning(
+            "🐾 \x1b[38;2;255;26;102m·\x1b[0m api failed %d times, next try at %s",
+            self.failures,
+            dt_util.as_local(self.retry_at).strftime("%H:%M:%S"),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the breaker for the diagnostics download."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_at": self.retry_at.isoformat() if self.retry_at else None,
+        }
@@ -5,7 +5,7 @@ import logging
 from typing import Any
 
 from homeassistant import config_entries, core, data_entry_flow
-from homeassistant.const import CONF_PASSWORD, CONF_TOKEN, CONF_USERNAME
+from homeassistant.const import CONF_PASSWORD, CONF_TOKEN, CONF_URL, CONF_USERNAME
 from homeassistant.core import callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from surepy import Surepy
@@ -14,13 +14,26 @@ import voluptuous as vol
 
 # pylint: disable=relative-beyond-top-level
 from .const import (
+    ATTR_HEALTH_INTERVAL,
+    ATTR_LOCAL_TOPIC,
+    ATTR_REFRESH_DEBOUNCE,
+    ATTR_SCAN_INTERVAL_MAX,
+    ATTR_SCAN_INTERVAL_MIN,
+    ATTR_VERBOSE_ATTRIBUTES,
     ATTR_VOLTAGE_FULL,
     ATTR_VOLTAGE_LOW,
     DOMAIN,
     SURE_API_TIMEOUT,
     SURE_BATT_VOLTAGE_FULL,
     SURE_BATT_VOLTAGE_LOW,
+    SURE_HEALTH_INTERVAL,
+    SURE_LOCAL_TOPIC,
+    SURE_REFRESH_DEBOUNCE,
+    SURE_SCAN_INTERVAL_MAX,
+    SURE_SCAN_INTERVAL_MIN,
+    SURE_VERBOSE_ATTRIBUTES,
 )
+from .endpoints import conflicting_entries, set_base_resource
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -32,6 +45,13 @@ DATA_SCHEMA = vol.Schema(
 async def is_valid(hass: core.HomeAssistant, user_input: dict[str, Any]) -> str | None:
     """Check if we can log in with the supplied credentials."""
 
+    # the loaded accounts must keep their api
+    if conflicting_entries(hass, user_input.get(CONF_URL)):
+        _LOGGER.error("Unable to use another API than the accounts already loaded")
+        return None
+
+    set_base_resource(user_input.get(CONF_URL))
+
     try:
         surepy = Surepy(
             user_input[CONF_USERNAME],
@@ -84,10 +104,17 @@ class SurePetcareConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type:
                 vol.Required("password"): str,
             }
 
+            # another api, e.g. a local stand-in server for load tests
+            if self.show_advanced_options:
+                data_schema[vol.Optional(CONF_URL)] = str
+
             return self.async_show_form(
                 step_id="user", data_schema=vol.Schema(data_schema), errors=errors
             )
 
+        if conflicting_entries(self.hass, user_input.get(CONF_URL)):
+            return self.async_abort(reason="api_conflict")
+
         if token := await is_valid(self.hass, user_input):
 
             uniq_username = user_input[CONF_USERNAME].casefold()
@@ -99,11 +126,45 @@ class SurePetcareConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type:
                     CONF_USERNAME: user_input[CONF_USERNAME],
                     CONF_PASSWORD: user_input[CONF_PASSWORD],
                     CONF_TOKEN: token,
+                    **({CONF_URL: url} if (url := user_input.get(CONF_URL)) else {}),
                 },
             )
 
         return self.async_abort(reason="authentication_failed")
 
+    async def async_step_reauth(
+        self, user_input: dict[str, Any] | None = None
+    ) -> data_entry_flow.FlowResult:
+        """Handle a failed authentication, try the stored credentials first."""
+
+        entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+
+        credentials = {
+            CONF_USERNAME: entry.data[CONF_USERNAME],
+            CONF_PASSWORD: entry.data[CONF_PASSWORD],
+        }
+
+        # the credentials entered by the user if the stored ones did not work
+        if user_input and CONF_TOKEN not in user_input:
+            credentials = {**credentials, **user_input}
+
+        if token := await is_valid(
+            self.hass, {**credentials, CONF_URL: entry.data.get(CONF_URL)}
+        ):
+
+            self.hass.config_entries.async_update_entry(
+                entry, data={**entry.data, **credentials, CONF_TOKEN: token}
+            )
+            await self.hass.config_entries.async_reload(entry.entry_id)
+
+            return self.async_abort(reason="reauth_successful")
+
+        return self.async_show_form(
+            step_id="reauth",
+            data_schema=DATA_SCHEMA,
+            errors={"base": "invalid_auth"} if user_input else {},
+        )
+
 
 class SureHAOptionsFlowHandler(config_entries.OptionsFlow):
     """Handle SureHA options."""
@@ -130,6 +191,42 @@ class SureHAOptionsFlowHandler(config_entries.OptionsFlow):
                     ATTR_VOLTAGE_FULL, SURE_BATT_VOLTAGE_FULL
                 ),
             ): float,
+            vol.Optional(
+                ATTR_SCAN_INTERVAL_MIN,
+                default=self.config_entry.options.get(
+                    ATTR_SCAN_INTERVAL_MIN, SURE_SCAN_INTERVAL_MIN
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=10)),
+            vol.Optional(
+                ATTR_SCAN_INTERVAL_MAX,
+                default=self.config_entry.options.get(
+                    ATTR_SCAN_INTERVAL_MAX, SURE_SCAN_INTERVAL_MAX
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=10)),
+            vol.Optional(
+                ATTR_HEALTH_INTERVAL,
+                default=self.config_entry.options.get(
+                    ATTR_HEALTH_INTERVAL, SURE_HEALTH_INTERVAL
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=300)),
+            vol.Optional(
+                ATTR_REFRESH_DEBOUNCE,
+                default=self.config_entry.options.get(
+                    ATTR_REFRESH_DEBOUNCE, SURE_REFRESH_DEBOUNCE
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+            vol.Optional(
+                ATTR_VERBOSE_ATTRIBUTES,
+                default=self.config_entry.options.get(
+                    ATTR_VERBOSE_ATTRIBUTES, SURE_VERBOSE_ATTRIBUTES
+                ),
+            ): bool,
+            vol.Optional(
+                ATTR_LOCAL_TOPIC,
+                default=self.config_entry.options.get(
+                    ATTR_LOCAL_TOPIC, SURE_LOCAL_TOPIC
+                ),
+            ): str,
         }
 
         return self.async_show_form(step_id="init", data_schema=vol.Schema(options))
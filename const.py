@@ -1,10 +1,18 @@
 """Constants for the Sure Petcare component."""
 DOMAIN = "sureha"
 
+# hass.data[DOMAIN] keys
 SPC = "spc"
+PET_IDS = "pet_ids"
+FLAP_IDS = "flap_ids"
+STAGGER = "stagger"
+SESSION = "session"
+OBSERVERS = "observers"
 
 # platforms
 TOPIC_UPDATE = f"{DOMAIN}_data_update"
+# new pets/devices of an account, formatted with the entry id
+SIGNAL_NEW_ENTITIES = f"{DOMAIN}_new_entities_{{}}"
 
 # sure petcare api
 SURE_API_TIMEOUT = 60
@@ -22,8 +30,107 @@ SURE_BATT_VOLTAGE_DIFF = SURE_BATT_VOLTAGE_FULL - SURE_BATT_VOLTAGE_LOW
 # services
 SERVICE_SET_LOCK_STATE = "set_lock_state"
 ATTR_FLAP_ID = "flap_id"
+ATTR_HOUSEHOLD_ID = "household_id"
 ATTR_LOCK_STATE = "lock_state"
+# fired with the result per flap of a set_lock_state call
+EVENT_LOCK_STATE_SET = f"{DOMAIN}_lock_state_set"
 
 SERVICE_PET_LOCATION = "set_pet_location"
 ATTR_PET_ID = "pet_id"
 ATTR_WHERE = "where"
+
+# polling
+ATTR_SCAN_INTERVAL_MIN = "scan_interval_min"
+ATTR_SCAN_INTERVAL_MAX = "scan_interval_max"
+SURE_SCAN_INTERVAL = 150
+SURE_SCAN_INTERVAL_MIN = 30
+SURE_SCAN_INTERVAL_MAX = 600
+# poll with the minimum interval for this long after activity
+SURE_SCAN_BOOST_DURATION = 600
+# start slowing down after this long without any change
+SURE_SCAN_IDLE_AFTER = 1800
+# poll with the maximum interval during the night (local time)
+SURE_SCAN_NIGHT_START = 23
+SURE_SCAN_NIGHT_END = 6
+
+# device health (batteries, signal, firmware, ...), refreshed by a full sync of
+# the household this often (seconds), the pets and flaps are polled in between
+ATTR_HEALTH_INTERVAL = "health_interval"
+SURE_HEALTH_INTERVAL = 3600
+
+# timeline
+# full resync of the household at least this often (seconds)
+SURE_FULL_SYNC_INTERVAL = 1800
+# events per timeline page, a full page may hide older unseen events
+SURE_TIMELINE_PAGE_SIZE = 25
+SURE_TIMELINE_MOVEMENT = 0
+
+# attributes
+ATTR_VERBOSE_ATTRIBUTES = "verbose_attributes"
+SURE_VERBOSE_ATTRIBUTES = False
+
+# request scheduling
+SURE_REQUEST_RATE = 1.0  # requests per second
+SURE_REQUEST_BURST = 5
+SURE_REQUEST_RETRIES = 3
+# seconds to wait after a 429 without a usable retry-after header
+SURE_RETRY_AFTER = 30
+
+# confirmation of commands
+SURE_CONFIRM_ATTEMPTS = 3
+SURE_CONFIRM_DELAY = 5
+# lock commands of a single set_lock_state call running at once
+SURE_LOCK_CONCURRENCY = 4
+
+# requested refreshes within this window share one (seconds)
+ATTR_REFRESH_DEBOUNCE = "refresh_debounce"
+SURE_REFRESH_DEBOUNCE = 2.0
+
+# circuit breaker
+# consecutive failed refreshes opening the breaker
+SURE_BREAKER_THRESHOLD = 3
+# first and longest wait until probing the api again (seconds)
+SURE_BREAKER_BACKOFF = 60
+SURE_BREAKER_BACKOFF_MAX = 3600
+# serve the last data during an outage at most this long (seconds)
+SURE_STALE_MAX_AGE = 86400
+
+# local hub messages via mqtt
+# topic a local hub bridge publishes to, empty for cloud polling only
+ATTR_LOCAL_TOPIC = "local_topic"
+SURE_LOCAL_TOPIC = ""
+# the local hub counts as active this long after its last message (seconds)
+SURE_LOCAL_ACTIVE_WINDOW = 3600
+
+# snapshot of the last good coordinator data
+SURE_SNAPSHOT_MAX_AGE = 86400  # seconds
+SURE_SNAPSHOT_SAVE_DELAY = 10  # seconds
+
+# auth tokens
+# refresh a token this long before it expires (seconds)
+SURE_TOKEN_REFRESH_MARGIN = 86400
+# try again this soon if the api was not reachable for a refresh (seconds)
+SURE_TOKEN_RETRY = 300
+
+# pet presence stats
+# location changes kept per pet
+SURE_PRESENCE_HISTORY = 50
+SURE_PRESENCE_SAVE_DELAY = 10  # seconds
+
+# food and water consumption
+# rolling window of the consumption totals (hours)
+SURE_CONSUMPTION_WINDOW = 24
+# smaller increases of a weight are noise, not a refill (grams/milliliters)
+SURE_CONSUMPTION_REFILL_MIN = 5
+SURE_CONSUMPTION_SAVE_DELAY = 10  # seconds
+
+# battery forecast
+# voltage samples per device at most this often (seconds)
+SURE_BATTERY_SAMPLE_INTERVAL = 3600
+# weight of a voltage sample halves after this many days
+SURE_BATTERY_HALF_LIFE = 30
+# no forecast before the samples span this many days
+SURE_BATTERY_MIN_SPAN = 2
+# a voltage this far above the trend means new batteries (volts per battery)
+SURE_BATTERY_REPLACED = 0.1
+SURE_BATTERY_SAVE_DELAY = 10  # seconds
@@ -0,0 +1,217 @@
+"""Food and water consumption from successive weight readings."""
+from __future__ import annotations
+
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import Any, NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+from surepy.entities import SurepyEntity
+from surepy.enums import EntityType
+
+# pylint: disable=relative-beyond-top-level
+from .const import (
+    SURE_CONSUMPTION_REFILL_MIN,
+    SURE_CONSUMPTION_SAVE_DELAY,
+    SURE_CONSUMPTION_WINDOW,
+)
+from .storage import PersistedState
+
+
+class ConsumptionTotals(NamedTuple):
+    """Consumed grams/milliliters today and in the rolling window, and refills."""
+
+    today: float
+    window: float
+    refills: int
+
+    def __add__(self, other: Any) -> ConsumptionTotals:
+        """Add up the totals of multiple bowls."""
+        return ConsumptionTotals(
+            self.today + other.today,
+            self.window + other.window,
+            self.refills + other.refills,
+        )
+
+
+class ConsumptionMeter:
+    """Consumption of a single bowl or water tank."""
+
+    def __init__(self, window: int = SURE_CONSUMPTION_WINDOW) -> None:
+        """Initialize the meter."""
+
+        self.value: float | None = None
+
+        self.day: date | None = None
+        self.today = 0.0
+        self.refills = 0
+
+        # hourly consumption of the rolling window: (start of the hour, amount)
+        self.hours: deque[tuple[datetime, float]] = deque(maxlen=window)
+
+    def reading(self, value: float, at: datetime) -> bool:
+        """Account a new reading, return False if nothing changed."""
+
+        previous, self.value = self.value, value
+
+        if previous is None or (delta := value - previous) == 0:
+            return previous is None
+
+        if self.day != (today := dt_util.as_local(at).date()):
+            self.day, self.today, self.refills = today, 0.0, 0
+
+        if delta < 0:
+            self.today -= delta
+
+            hour = at.replace(minute=0, second=0, microsecond=0)
+            if self.hours and self.hours[-1][0] == hour:
+                self.hours[-1] = (hour, self.hours[-1][1] - delta)
+            else:
+                self.hours.append((hour, -delta))
+
+        # small increases are measurement noise
+        elif delta >= SURE_CONSUMPTION_REFILL_MIN:
+            self.refills += 1
+
+        return True
+
+    def totals(self, now: datetime | None = None) -> ConsumptionTotals:
+        """Return the consumption of today and of the rolling window."""
+
+        now = now or dt_util.utcnow()
+        start = now - timedelta(hours=self.hours.maxlen or 0)
+
+        if self.day == dt_util.as_local(now).date():
+            today, refills = self.today, self.refills
+        else:
+            today, refills = 0.0, 0
+
+        return ConsumptionTotals(
+            today,
+            sum(amount for hour, amount in self.hours if hour >= start),
+            refills,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the meter for the storage."""
+
+        return {
+            "value": self.value,
+            "day": self.day.isoformat() if self.day else None,
+            "today": self.today,
+            "refills": self.refills,
+            "hours": [[hour.isoformat(), amount] for hour, amount in self.hours],
+        }
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, Any], window: int = SURE_CONSUMPTION_WINDOW
+    ) -> ConsumptionMeter:
+        """Restore the meter from the storage."""
+
+        meter = cls(window)
+
+        meter.value = data.get("value")
+        meter.day = dt_util.parse_date(str(data.get("day")))
+        meter.today = float(data.get("today", 0))
+        meter.refills = int(data.get("refills", 0))
+        meter.hours.extend(
+            (hour, float(amount))
+            for timestamp, amount in data.get("hours", [])
+            if (hour := dt_util.parse_datetime(timestamp))
+        )
+
+        return meter
+
+
+def _readings(device: SurepyEntity) -> dict[int, float]:
+    """Return the current weights per bowl or the remaining water of a device."""
+
+    raw_data = device.raw_data()
+
+    if device.type in [EntityType.FEEDER, EntityType.FEEDER_LITE]:
+        return {
+            int(bowl["index"]): float(bowl["weight"])
+            for bowl in (raw_data.get("lunch") or {}).get("weights", [])
+            if bowl.get("weight") is not None
+        }
+
+    if device.type == EntityType.FELAQUA and (
+        remaining := (raw_data.get("latest_drink") or {}).get("remaining")
+    ) is not None:
+        return {0: float(remaining)}
+
+    return {}
+
+
+class ConsumptionTracker(PersistedState):
+    """Consumption of the feeders and felaquas of an account, persisted."""
+
+    key = "consumption"
+    description = "consumption"
+    save_delay = SURE_CONSUMPTION_SAVE_DELAY
+
+    def __init__(
+        self, hass: HomeAssistant, entry_id: str, window: int = SURE_CONSUMPTION_WINDOW
+    ) -> None:
+        """Initialize the tracker."""
+
+        self.window = window
+        # meters per device and bowl, a felaqua has a single "bowl" 0
+        self.devices: dict[int, dict[int, ConsumptionMeter]] = {}
+
+        super().__init__(hass, entry_id)
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Restore the meters of the last run."""
+        self.devices = {
+            int(device_id): {
+                int(index): ConsumptionMeter.from_dict(meter, self.window)
+                for index, meter in meters.items()
+            }
+            for device_id, meters in data.get("devices", {}).items()
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the meters to store."""
+        return {
+            "devices": {
+                str(device_id): {
+                    str(index): meter.as_dict() for index, meter in meters.items()
+                }
+                for device_id, meters in self.devices.items()
+            }
+        }
+
+    @callback
+    def update(self, entities: dict[int, SurepyEntity], ids: set[int]) -> None:
+        """Account the new readings of the given devices."""
+
+        now, changed = dt_util.utcnow(), False
+
+        for _id in ids:
+
+            if (device := entities.get(_id)) is None:
+                continue
+
+            for index, value in _readings(device).items():
+                meters = self.devices.setdefault(_id, {})
+                meter = meters.setdefault(index, ConsumptionMeter(self.window))
+                changed |= meter.reading(value, now)
+
+        if changed:
+            self.async_save()
+
+    def totals(self, device_id: int, index: int | None = None) -> ConsumptionTotals:
+        """Return the totals of a bowl, or of all bowls of a device."""
+
+        meters = self.devices.get(device_id, {})
+
+        if index is not None:
+            meters = {index: meters[index]} if index in meters else {}
+
+        return sum(
+            (meter.totals() for meter in meters.values()),
+            ConsumptionTotals(0.0, 0.0, 0),
+        )
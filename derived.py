@@ -0,0 +1,122 @@
+"""Derived state of the surepy entities, shared by all platforms."""
+from __future__ import annotations
+
+from typing import Any, Callable, Hashable, Iterable, NamedTuple
+
+from homeassistant.const import ATTR_VOLTAGE
+from surepy.entities import SurepyEntity
+from surepy.entities.devices import SurepyDevice
+from surepy.entities.pet import Pet as SurePet
+from surepy.enums import Location
+
+
+class PetPresence(NamedTuple):
+    """Location of a pet."""
+
+    inside: bool
+    attributes: dict[str, Any]
+
+
+class BatteryState(NamedTuple):
+    """Battery of a device."""
+
+    level: int | None
+    attributes: dict[str, Any]
+
+
+class DerivedState:
+    """Values computed once per change of a surepy entity."""
+
+    def __init__(
+        self, attributes: Callable[[SurepyEntity], dict[str, Any]]
+    ) -> None:
+        """Initialize the derived state."""
+
+        # builds the state attributes of a surepy entity
+        self.attributes = attributes
+
+        self._cache: dict[int, dict[Hashable, Any]] = {}
+
+    def invalidate(self, ids: Iterable[int]) -> None:
+        """Drop the values derived from the given entities."""
+        for _id in ids:
+            self._cache.pop(_id, None)
+
+    def clear(self) -> None:
+        """Drop all derived values."""
+        self._cache.clear()
+
+    def _get(self, _id: int, key: Hashable, compute: Callable[[], Any]) -> Any:
+        cache = self._cache.setdefault(_id, {})
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+
+    def pet(self, pet: SurePet) -> PetPresence:
+        """Return the location of a pet."""
+        return self._get(
+            pet.id, "pet", lambda: _pet_presence(pet, self.attributes(pet))
+        )
+
+    def battery(
+        self, device: SurepyDevice, voltage_full: float, voltage_low: float
+    ) -> BatteryState:
+        """Return the battery level and voltages of a device."""
+        return self._get(
+            device.id,
+            ("battery", voltage_full, voltage_low),
+            lambda: _battery(device, voltage_full, voltage_low),
+        )
+
+    def connectivity(self, device: SurepyDevice) -> dict[str, Any]:
+        """Return the signal strengths of a device, empty if it is offline."""
+        return self._get(device.id, "connectivity", lambda: _connectivity(device))
+
+
+def _pet_presence(pet: SurePet, attributes: dict[str, Any]) -> PetPresence:
+
+    return PetPresence(
+        inside=bool(pet.location.where == Location.INSIDE),
+        attributes={
+            "since": pet.location.since,
+            "where": pet.location.where,
+            **attributes,
+        },
+    )
+
+
+def _battery(
+    device: SurepyDevice, voltage_full: float, voltage_low: float
+) -> BatteryState:
+
+    attrs: dict[str, Any] = {}
+
+    if state := device.raw_data().get("status"):
+
+        voltage = float(state["battery"])
+
+        attrs = {
+            "battery_level": device.battery_level,
+            ATTR_VOLTAGE: f"{voltage:.2f}",
+            f"{ATTR_VOLTAGE}_per_battery": f"{voltage / 4:.2f}",
+        }
+
+    return BatteryState(
+        level=device.calculate_battery_level(
+            voltage_full=voltage_full, voltage_low=voltage_low
+        ),
+        attributes=attrs,
+    )
+
+
+def _connectivity(device: SurepyDevice) -> dict[str, Any]:
+
+    attrs: dict[str, Any] = {}
+
+    if state := device.raw_data().get("status"):
+        attrs = {
+            "device_rssi": f'{state["signal"]["device_rssi"]:.2f}',
+            "hub_rssi": f'{state["signal"]["hub_rssi"]:.2f}',
+        }
+
+    return attrs
@@ -3,14 +3,16 @@ import logging
 from typing import Any
 
 from homeassistant.components.device_tracker.config_entry import ScannerEntity
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from surepy.entities import EntityType
 from surepy.entities.pet import Pet as SurePet
-from surepy.enums import Location
 
 # pylint: disable=relative-beyond-top-level
 from . import DOMAIN, SurePetcareAPI
-from .const import SPC
+from .const import SIGNAL_NEW_ENTITIES, SPC
+from .index import EntityIndex
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,17 +22,26 @@ SOURCE_TYPE_FLAP = "flap"
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Pet tracker from config entry."""
 
-    spc: SurePetcareAPI = hass.data[DOMAIN][SPC]
+    spc: SurePetcareAPI = hass.data[DOMAIN][SPC][config_entry.entry_id]
 
-    async_add_entities(
-        [
-            SureDeviceTracker(spc.coordinator, pet.id, spc)
-            for pet in spc.coordinator.data.values()
-            if pet.type == EntityType.PET
-        ],
-        True,
+    @callback
+    def async_add_new(index: EntityIndex) -> None:
+        """Add the trackers of pets new to the account."""
+        async_add_entities(
+            [
+                SureDeviceTracker(spc.coordinator, pet.id, spc)
+                for pet in index.of_type(EntityType.PET)
+            ]
+        )
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_NEW_ENTITIES.format(config_entry.entry_id), async_add_new
+        )
     )
 
+    async_add_new(spc.index)
+
 
 class SureDeviceTracker(CoordinatorEntity, ScannerEntity):
     """Pet device tracker."""
@@ -63,6 +74,14 @@ class SureDeviceTracker(CoordinatorEntity, ScannerEntity):
         # picture of the pet that can be added via the sure app/website
         self._attr_entity_picture = self._surepy_entity.photo_url
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if the pet changed."""
+        # the tracker of a vanished pet waits for its removal
+        if self._id in self._spc.changed_ids and self._id in self.coordinator.data:
+            self._spc.metrics.state_written()
+            super()._handle_coordinator_update()
+
     @property
     def is_connected(self) -> bool:
         """Return true if the device is connected to the network."""
@@ -76,14 +95,9 @@ class SureDeviceTracker(CoordinatorEntity, ScannerEntity):
         attrs: dict[str, Any] = {}
 
         if pet := self._coordinator.data[self._id]:
+            attrs = self._spc.derived.pet(pet).attributes
 
-            attrs = {
-                "since": pet.location.since,
-                "where": pet.location.where,
-                **pet.raw_data(),
-            }
-
-        return attrs
+        return {**attrs, **self._spc.stale_attributes}
 
     @property
     def location_name(self) -> str:
@@ -93,7 +107,7 @@ class SureDeviceTracker(CoordinatorEntity, ScannerEntity):
         inside: bool = False
 
         if pet := self._coordinator.data[self._id]:
-            inside = bool(pet.location.where == Location.INSIDE)
+            inside = self._spc.derived.pet(pet).inside
 
         return "home" if inside else "not_home"
 
@@ -0,0 +1,89 @@
+"""Device info of the Sure Petcare devices and pets."""
+from __future__ import annotations
+
+from copy import deepcopy
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from surepy.entities import SurepyEntity
+
+# pylint: disable=relative-beyond-top-level
+from .const import DOMAIN, SURE_MANUFACTURER
+
+
+class DeviceInfoRegistry:
+    """Build the device info once per device and firmware version."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._cache: dict[int, tuple[Any, dict[str, Any]]] = {}
+
+    def device_info(
+        self, _id: int, surepy_entity: SurepyEntity, state: dict[str, Any] | None
+    ) -> dict[str, Any]:
+        """Return the (cached) device info of a surepy entity."""
+
+        versions = state.get("version", {}) if state else {}
+        revision = (surepy_entity.name, versions)
+
+        if (cached := self._cache.get(_id)) and cached[0] == revision:
+            return cached[1]
+
+        device = _build_device_info(_id, surepy_entity, versions)
+        self._cache[_id] = (deepcopy(revision), device)
+
+        return device
+
+
+def account_device_info(config_entry: ConfigEntry) -> dict[str, Any]:
+    """Return the device info of an account, e.g. for its diagnostic entities."""
+    return {
+        "identifiers": {(DOMAIN, config_entry.entry_id)},
+        "name": f"{config_entry.title} ({config_entry.unique_id})"
+        if config_entry.unique_id
+        else config_entry.title,
+        "manufacturer": SURE_MANUFACTURER,
+        "model": "Account",
+    }
+
+
+def _build_device_info(
+    _id: int, surepy_entity: SurepyEntity, versions: dict[str, Any]
+) -> dict[str, Any]:
+
+    device: dict[str, Any] = {}
+
+    try:
+
+        raw_data = surepy_entity.raw_data()
+
+        model = f"{surepy_entity.type.name.replace('_', ' ').title()}"
+        if serial := raw_data.get("serial_number"):
+            model = f"{model} ({serial})"
+        elif mac_address := raw_data.get("mac_address"):
+            model = f"{model} ({mac_address})"
+        elif tag_id := raw_data.get("tag_id"):
+            model = f"{model} ({tag_id})"
+
+        device = {
+            "identifiers": {(DOMAIN, _id)},
+            "name": surepy_entity.name.capitalize(),
+            "manufacturer": SURE_MANUFACTURER,
+            "model": model,
+        }
+
+        if dev_fw_version := versions.get("device", {}).get("firmware"):
+            device["sw_version"] = dev_fw_version
+
+        if (lcd_version := versions.get("lcd", {})) and (
+            rf_version := versions.get("rf", {})
+        ):
+            device["sw_version"] = (
+                f"lcd: {lcd_version.get('version', lcd_version)['firmware']} | "
+                f"fw: {rf_version.get('version', rf_version)['firmware']}"
+            )
+
+    except AttributeError:
+        pass
+
+    return device
@@ -0,0 +1,60 @@
+"""Diagnostics download of a Sure Petcare account."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_TOKEN, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+# pylint: disable=relative-beyond-top-level
+from . import SurePetcareAPI
+from .const import DOMAIN, SPC
+
+TO_REDACT = {CONF_PASSWORD, CONF_TOKEN, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the performance metrics and polling state of an account."""
+
+    spc: SurePetcareAPI = hass.data[DOMAIN][SPC][entry.entry_id]
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "metrics": spc.metrics.as_dict(),
+        "polling": {
+            "update_interval": spc.coordinator.update_interval.total_seconds()
+            if spc.coordinator.update_interval
+            else None,
+            "last_update_success": spc.coordinator.last_update_success,
+            "stale": spc.stale,
+            "last_updated": spc.last_updated.isoformat()
+            if spc.last_updated
+            else None,
+        },
+        "health": {
+            "update_interval": spc.health_interval.total_seconds(),
+            "last_update_success": spc.health.last_update_success,
+            "synced": spc.health_synced.isoformat() if spc.health_synced else None,
+        },
+        "breaker": spc.breaker.as_dict(),
+        "sources": {source.name: source.as_dict() for source in spc.push_sources},
+        "requests": {
+            "pending": spc.requests.pending,
+            "queued": spc.requests.queued,
+            "throttled": spc.requests.throttled,
+        },
+        "presence": {
+            str(_id): stats.as_dict() for _id, stats in spc.presence.pets.items()
+        },
+        "entities": {
+            str(_id): entity.type.name
+            for _id, entity in (spc.coordinator.data or {}).items()
+        },
+    }
@@ -0,0 +1,75 @@
+"""Point surepy at another Sure Petcare api, e.g. a local stand-in server."""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import CONF_URL
+from homeassistant.core import HomeAssistant
+import surepy
+import surepy.client
+import surepy.const as surepy_const
+
+# pylint: disable=relative-beyond-top-level
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# surepy binds the endpoints at import time in these modules
+_MODULES = (surepy_const, surepy.client, surepy)
+
+DEFAULT_BASE_RESOURCE: str = surepy_const.BASE_RESOURCE
+
+# accounts using the endpoints right now
+ACTIVE_STATES = (ConfigEntryState.LOADED, ConfigEntryState.SETUP_IN_PROGRESS)
+
+
+def base_resource(url: str | None) -> str:
+    """Return the base of the endpoints of an api url, None for the cloud api."""
+    return (url or DEFAULT_BASE_RESOURCE).rstrip("/")
+
+
+def conflicting_entries(
+    hass: HomeAssistant, url: str | None, entry_id: str | None = None
+) -> list[ConfigEntry]:
+    """Return the other active accounts using another api than the given url.
+
+    All accounts share the endpoints, switching them would redirect the others.
+    """
+
+    return [
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.entry_id != entry_id
+        and entry.state in ACTIVE_STATES
+        and base_resource(entry.data.get(CONF_URL)) != base_resource(url)
+    ]
+
+
+def set_base_resource(url: str | None) -> None:
+    """Replace the base of all surepy endpoints, None restores the cloud api.
+
+    The endpoints are module constants in surepy, so this applies to all accounts,
+    see conflicting_entries.
+    """
+
+    new_base = base_resource(url)
+
+    if (current_base := surepy_const.BASE_RESOURCE) == new_base:
+        return
+
+    for module in _MODULES:
+        for name, value in list(vars(module).items()):
+            # the templates containing "{BASE_RESOURCE}" are formatted per call
+            if (
+                name.endswith("_RESOURCE")
+                and isinstance(value, str)
+                and value.startswith(current_base)
+            ):
+                setattr(module, name, f"{new_base}{value[len(current_base):]}")
+
+    if new_base != DEFAULT_BASE_RESOURCE:
+        _LOGGER.warning(
+            "🐾 \x1b[38;2;255;26;102m·\x1b[0m using the sure petcare api at %s",
+            new_base,
+        )
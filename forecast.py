@@ -0,0 +1,218 @@
+"""Battery depletion forecast from a running fit of the voltage over time."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import math
+from typing import Any, Iterable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+from surepy.entities import SurepyEntity
+
+# pylint: disable=relative-beyond-top-level
+from .const import (
+    SURE_BATTERY_HALF_LIFE,
+    SURE_BATTERY_MIN_SPAN,
+    SURE_BATTERY_REPLACED,
+    SURE_BATTERY_SAMPLE_INTERVAL,
+    SURE_BATTERY_SAVE_DELAY,
+)
+from .storage import PersistedState
+
+SECONDS_PER_DAY = 86400
+
+
+class VoltageTrend:
+    """Least squares line through the voltages, older samples fade out.
+
+    Keeps only the (exponentially weighted) sums of the samples.
+    """
+
+    def __init__(
+        self, half_life: float = SURE_BATTERY_HALF_LIFE, min_span: float = 0.0
+    ) -> None:
+        """Initialize the trend, half life and span in days."""
+
+        self.half_life = half_life
+        self.min_span = min_span
+
+        self.origin: datetime | None = None
+        self.last: datetime | None = None
+
+        # weighted sums of 1, t, v, t², t·v with t in days since the origin
+        self.sums = [0.0, 0.0, 0.0, 0.0, 0.0]
+
+    def _days(self, at: datetime) -> float:
+        return (at - self.origin).total_seconds() / SECONDS_PER_DAY  # type: ignore
+
+    def add(self, voltage: float, at: datetime) -> None:
+        """Add a sample."""
+
+        if self.origin is None:
+            self.origin = at
+
+        days = self._days(at)
+
+        if self.last is not None:
+            decay = 0.5 ** (max(0.0, days - self._days(self.last)) / self.half_life)
+            self.sums = [value * decay for value in self.sums]
+
+        sample = (1.0, days, voltage, days * days, days * voltage)
+        self.sums = [value + added for value, added in zip(self.sums, sample)]
+
+        self.last = at
+
+    def slope(self) -> float | None:
+        """Return the change of the voltage per day, None if not known yet."""
+
+        if not self.origin or not self.last or self._days(self.last) < self.min_span:
+            return None
+
+        weight, days, voltage, days_squared, days_voltage = self.sums
+
+        if (variance := weight * days_squared - days * days) <= 1e-9:
+            return None
+
+        return (weight * days_voltage - days * voltage) / variance
+
+    def voltage(self, at: datetime) -> float | None:
+        """Return the voltage of the fitted line at the given time."""
+
+        if (slope := self.slope()) is None:
+            return None
+
+        weight, days, voltage, *_ = self.sums
+        return (voltage - slope * days) / weight + slope * self._days(at)
+
+    def expected(self, at: datetime) -> float | None:
+        """Return the fitted voltage, the average one if there is no line yet."""
+
+        if (voltage := self.voltage(at)) is not None:
+            return voltage
+
+        return self.sums[2] / self.sums[0] if self.sums[0] else None
+
+    def days_remaining(
+        self, voltage_low: float, voltage_full: float, now: datetime | None = None
+    ) -> float | None:
+        """Return the days until the voltage drops to voltage_low."""
+
+        now = now or dt_util.utcnow()
+
+        if (slope := self.slope()) is None or (voltage := self.voltage(now)) is None:
+            return None
+
+        # a rising or flat voltage gives no forecast
+        if slope >= 0:
+            return None
+
+        voltage = min(voltage, voltage_full)
+        return max(0.0, (voltage - voltage_low) / -slope)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the trend for the storage."""
+
+        return {
+            "origin": self.origin.isoformat() if self.origin else None,
+            "last": self.last.isoformat() if self.last else None,
+            "sums": self.sums,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], **kwargs: Any) -> VoltageTrend:
+        """Restore the trend from the storage."""
+
+        trend = cls(**kwargs)
+
+        trend.origin = dt_util.parse_datetime(str(data.get("origin")))
+        trend.last = dt_util.parse_datetime(str(data.get("last")))
+        if len(sums := [float(value) for value in data.get("sums", [])]) == 5:
+            trend.sums = sums
+
+        return trend
+
+
+def _voltage(device: SurepyEntity) -> float | None:
+    """Return the voltage per battery of a device, None if it has none."""
+
+    try:
+        voltage = float(device.raw_data()["status"]["battery"]) / 4
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    return voltage if math.isfinite(voltage) and voltage > 0 else None
+
+
+class BatteryForecast(PersistedState):
+    """Voltage trends of the battery powered devices of an account, persisted."""
+
+    key = "batteries"
+    description = "battery trends"
+    save_delay = SURE_BATTERY_SAVE_DELAY
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        sample_interval: timedelta = timedelta(seconds=SURE_BATTERY_SAMPLE_INTERVAL),
+    ) -> None:
+        """Initialize the forecast."""
+
+        self.sample_interval = sample_interval
+        self.devices: dict[int, VoltageTrend] = {}
+
+        super().__init__(hass, entry_id)
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Restore the trends of the last run."""
+        self.devices = {
+            int(_id): VoltageTrend.from_dict(trend, min_span=SURE_BATTERY_MIN_SPAN)
+            for _id, trend in data.get("devices", {}).items()
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the trends to store."""
+        return {
+            "devices": {
+                str(_id): trend.as_dict() for _id, trend in self.devices.items()
+            }
+        }
+
+    @callback
+    def update(self, devices: Iterable[SurepyEntity]) -> None:
+        """Sample the voltages, at most once per sample interval and device."""
+
+        now, sampled = dt_util.utcnow(), False
+
+        for device in devices:
+
+            trend = self.devices.get(_id := device.id)
+
+            if trend and trend.last and now - trend.last < self.sample_interval:
+                continue
+
+            if (voltage := _voltage(device)) is None:
+                continue
+
+            # start over after the batteries have been replaced
+            if trend is None or (
+                (expected := trend.expected(now)) is not None
+                and voltage - expected > SURE_BATTERY_REPLACED
+            ):
+                trend = self.devices[_id] = VoltageTrend(min_span=SURE_BATTERY_MIN_SPAN)
+
+            trend.add(voltage, now)
+            sampled = True
+
+        if sampled:
+            self.async_save()
+
+    def days_remaining(
+        self, device_id: int, voltage_low: float, voltage_full: float
+    ) -> float | None:
+        """Return the forecasted days until the batteries of a device are low."""
+
+        if trend := self.devices.get(device_id):
+            return trend.days_remaining(voltage_low, voltage_full)
+
+        return None
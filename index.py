@@ -0,0 +1,56 @@
+"""Index of the surepy entities of an account, built once per update."""
+from __future__ import annotations
+
+from surepy.entities import SurepyEntity
+from surepy.entities.devices import FeederBowl
+from surepy.enums import EntityType
+
+FLAPS = (EntityType.CAT_FLAP, EntityType.PET_FLAP)
+# devices connected to a hub, running on batteries
+HUB_DEVICES = (*FLAPS, EntityType.FEEDER, EntityType.FELAQUA)
+
+
+class EntityIndex:
+    """The surepy entities by type and household, and the bowls of the feeders."""
+
+    def __init__(self, entities: dict[int, SurepyEntity] | None = None) -> None:
+        """Build the index."""
+
+        self.by_type: dict[EntityType, list[SurepyEntity]] = {}
+        self.by_household: dict[int, list[SurepyEntity]] = {}
+        self.bowls: dict[int, list[FeederBowl]] = {}
+
+        for entity in (entities or {}).values():
+
+            self.by_type.setdefault(entity.type, []).append(entity)
+            self.by_household.setdefault(entity.household_id, []).append(entity)
+
+            if bowls := getattr(entity, "bowls", None):
+                self.bowls[entity.id] = list(bowls.values())
+
+        self.pet_ids: frozenset[int] = frozenset(
+            entity.id for entity in self.of_type(EntityType.PET)
+        )
+        self.flap_ids: frozenset[int] = frozenset(
+            entity.id for entity in self.of_type(*FLAPS)
+        )
+
+    def of_type(self, *types: EntityType) -> list[SurepyEntity]:
+        """Return the entities of the given types."""
+
+        if len(types) == 1:
+            return self.by_type.get(types[0], [])
+
+        return [entity for _type in types for entity in self.by_type.get(_type, [])]
+
+    def of_household(
+        self, household_id: int, *types: EntityType
+    ) -> list[SurepyEntity]:
+        """Return the entities of a household, optionally only of the given types."""
+
+        entities = self.by_household.get(household_id, [])
+
+        if not types:
+            return entities
+
+        return [entity for entity in entities if entity.type in types]
@@ -0,0 +1,169 @@
+"""Performance metrics of an account, for the diagnostic sensors and downloads."""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import datetime
+import re
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+from homeassistant.util import dt as dt_util
+
+# weight of the newest sample in the moving averages
+SMOOTHING = 0.2
+
+# ids in the api paths, e.g. /api/device/123456/control
+_IDS = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint(url: str) -> str:
+    """Return the endpoint of an api url, without the query and the ids."""
+    return _IDS.sub("/{id}", urlsplit(url).path)
+
+
+def _smooth(average: float | None, sample: float) -> float:
+    return sample if average is None else average + SMOOTHING * (sample - average)
+
+
+@dataclass
+class EndpointMetrics:
+    """Latency and traffic of a single api endpoint."""
+
+    requests: int = 0
+    errors: int = 0
+    latency_avg: float | None = None
+    latency_max: float = 0.0
+    bytes: int = 0
+
+
+class PerformanceMetrics:
+    """Refresh durations, api latencies and state writes of an account."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+
+        self.refreshes = 0
+        self.failures = 0
+        self.refresh_duration: float | None = None
+        self.refresh_duration_avg: float | None = None
+        self.last_success: datetime | None = None
+
+        # refreshes asked for by commands, and the ones spared by sharing
+        self.refresh_requests = 0
+        self.refreshes_saved = 0
+
+        self.entity_count = 0
+        self.payload_bytes = 0
+        # state writes of the entities since the last refresh
+        self.state_writes = 0
+
+        self.endpoints: dict[str, EndpointMetrics] = {}
+
+        self._refresh_started: float | None = None
+
+    @property
+    def seconds_since_success(self) -> float | None:
+        """Return the age of the last successful refresh."""
+
+        if not self.last_success:
+            return None
+
+        return (dt_util.utcnow() - self.last_success).total_seconds()
+
+    @property
+    def latency_avg(self) -> float | None:
+        """Return the average api latency over all endpoints."""
+
+        weighted = [
+            (metrics.latency_avg, metrics.requests)
+            for metrics in self.endpoints.values()
+            if metrics.latency_avg is not None
+        ]
+
+        if not (requests := sum(count for _, count in weighted)):
+            return None
+
+        return sum(latency * count for latency, count in weighted) / requests
+
+    def refresh_started(self) -> None:
+        """Start timing a refresh."""
+        self._refresh_started = time.monotonic()
+        self.state_writes = 0
+
+    def refresh_finished(self, success: bool, entity_count: int | None = None) -> None:
+        """Stop timing a refresh."""
+
+        if self._refresh_started is not None:
+            self.refresh_duration = time.monotonic() - self._refresh_started
+            self.refresh_duration_avg = _smooth(
+                self.refresh_duration_avg, self.refresh_duration
+            )
+            self._refresh_started = None
+
+        self.refreshes += 1
+
+        if not success:
+            self.failures += 1
+            return
+
+        self.last_success = dt_util.utcnow()
+
+        if entity_count is not None:
+            self.entity_count = entity_count
+
+    def refresh_requested(self) -> None:
+        """Count a refresh asked for, e.g. to confirm a command."""
+        self.refresh_requests += 1
+
+    def refresh_saved(self) -> None:
+        """Count a refresh (or fetch) spared by sharing another one."""
+        self.refreshes_saved += 1
+
+    def state_written(self) -> None:
+        """Count the state write of an entity."""
+        self.state_writes += 1
+
+    def observe(self, url: str, status: int, headers: Any, latency: float) -> None:
+        """Record a response of the api."""
+
+        try:
+            # not sent for chunked responses, their payload is not counted
+            size = int(headers.get("Content-Length", 0))
+        except (TypeError, ValueError):
+            size = 0
+
+        metrics = self.endpoints.setdefault(endpoint(url), EndpointMetrics())
+
+        metrics.requests += 1
+        metrics.errors += status >= 400
+        metrics.latency_avg = _smooth(metrics.latency_avg, latency)
+        metrics.latency_max = max(metrics.latency_max, latency)
+
+        if size > 0:
+            metrics.bytes += size
+            self.payload_bytes += size
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for the diagnostics download."""
+
+        return {
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "refresh_duration": self.refresh_duration,
+            "refresh_duration_avg": self.refresh_duration_avg,
+            "last_success": (
+                self.last_success.isoformat() if self.last_success else None
+            ),
+            "seconds_since_success": self.seconds_since_success,
+            "refresh_requests": self.refresh_requests,
+            "refreshes_saved": self.refreshes_saved,
+            "entity_count": self.entity_count,
+            "payload_bytes": self.payload_bytes,
+            "state_writes": self.state_writes,
+            "latency_avg": self.latency_avg,
+            "endpoints": {
+                name: asdict(metrics)
+                for name, metrics in sorted(self.endpoints.items())
+            },
+        }
@@ -0,0 +1,43 @@
+"""Optimistic updates of the cached surepy data after commands."""
+from __future__ import annotations
+
+from typing import Any
+
+import surepy.const as surepy_const
+
+
+def device_status_resource(device_id: int) -> str:
+    """Return the resource with the current status of a single device."""
+    return f"{surepy_const.BASE_RESOURCE}/device/{device_id}?with%5B%5D=status"
+
+
+def pet_position_resource(pet_id: int) -> str:
+    """Return the resource with the current position of a single pet."""
+    return surepy_const.POSITION_RESOURCE.format(
+        BASE_RESOURCE=surepy_const.BASE_RESOURCE, pet_id=pet_id
+    )
+
+
+def lock_mode(raw_data: dict[str, Any]) -> int | None:
+    """Return the lock mode of a flap."""
+    return raw_data.get("status", {}).get("locking", {}).get("mode")
+
+
+def set_lock_mode(raw_data: dict[str, Any], mode: int) -> None:
+    """Set the lock mode of a flap."""
+    raw_data.setdefault("status", {}).setdefault("locking", {})["mode"] = mode
+
+
+def set_status(raw_data: dict[str, Any], device: dict[str, Any]) -> None:
+    """Replace the status of a device by a freshly fetched one."""
+    if "status" in device:
+        raw_data["status"] = device["status"]
+
+
+def set_position(raw_data: dict[str, Any], position: dict[str, Any]) -> None:
+    """Set the position of a pet."""
+
+    raw_data["position"] = {**raw_data.get("position", {}), **position}
+
+    if (status := raw_data.get("status")) and "activity" in status:
+        status["activity"] = {**status["activity"], **position}
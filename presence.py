@@ -0,0 +1,210 @@
+"""Running totals of the pet locations, updated per location change."""
+from __future__ import annotations
+
+from collections import deque
+from datetime import date, datetime
+from typing import Any, NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+from surepy.entities import SurepyEntity
+from surepy.enums import EntityType, Location
+
+# pylint: disable=relative-beyond-top-level
+from .const import SURE_PRESENCE_HISTORY, SURE_PRESENCE_SAVE_DELAY
+from .storage import PersistedState
+
+
+class PresenceTotals(NamedTuple):
+    """Time inside and outside today, in seconds, and the trips."""
+
+    inside: float
+    outside: float
+    trips: int
+    last_trip: float | None
+
+
+class PresenceStats:
+    """Location changes of a pet and the totals of the current (local) day."""
+
+    def __init__(self, history: int = SURE_PRESENCE_HISTORY) -> None:
+        """Initialize the stats."""
+
+        # the latest location changes: (time, inside)
+        self.transitions: deque[tuple[datetime, bool]] = deque(maxlen=history)
+
+        self.inside: bool | None = None
+        self.since: datetime | None = None
+
+        # totals of the closed periods of the day
+        self.day: date | None = None
+        self.seconds_inside = 0.0
+        self.seconds_outside = 0.0
+        self.trips = 0
+        self.last_trip: float | None = None
+
+    def transition(self, inside: bool, at: datetime) -> bool:
+        """Record a location change, return False if the pet did not move."""
+
+        if inside == self.inside:
+            return False
+
+        # timestamps older than the current period are not trustworthy
+        if self.since and at < self.since:
+            at = self.since
+
+        if self.day != (today := dt_util.as_local(at).date()):
+            self.day, self.seconds_inside, self.seconds_outside = today, 0.0, 0.0
+            self.trips = 0
+
+        if self.since is not None:
+            elapsed = self._elapsed_today(at)
+            if self.inside:
+                self.seconds_inside += elapsed
+            else:
+                self.seconds_outside += elapsed
+                self.last_trip = (at - self.since).total_seconds()
+
+        # the first known location is no trip
+        if not inside and self.inside is not None:
+            self.trips += 1
+
+        self.inside, self.since = inside, at
+        self.transitions.append((at, inside))
+
+        return True
+
+    def totals(self, now: datetime | None = None) -> PresenceTotals:
+        """Return the totals of today, including the current period."""
+
+        now = now or dt_util.utcnow()
+
+        if self.day == dt_util.as_local(now).date():
+            inside, outside = self.seconds_inside, self.seconds_outside
+            trips = self.trips
+        else:
+            inside, outside, trips = 0.0, 0.0, 0
+
+        if self.since is not None:
+            if self.inside:
+                inside += self._elapsed_today(now)
+            else:
+                outside += self._elapsed_today(now)
+
+        return PresenceTotals(inside, outside, trips, self.last_trip)
+
+    def _elapsed_today(self, until: datetime) -> float:
+        """Return the time of the current period since the start of the day."""
+
+        start = max(self.since, dt_util.start_of_local_day(dt_util.as_local(until)))
+        return max(0.0, (until - start).total_seconds())
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stats for the storage."""
+
+        return {
+            "transitions": [
+                [at.isoformat(), inside] for at, inside in self.transitions
+            ],
+            "inside": self.inside,
+            "since": self.since.isoformat() if self.since else None,
+            "day": self.day.isoformat() if self.day else None,
+            "seconds_inside": self.seconds_inside,
+            "seconds_outside": self.seconds_outside,
+            "trips": self.trips,
+            "last_trip": self.last_trip,
+        }
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, Any], history: int = SURE_PRESENCE_HISTORY
+    ) -> PresenceStats:
+        """Restore the stats from the storage."""
+
+        stats = cls(history)
+
+        stats.transitions.extend(
+            (at, bool(inside))
+            for timestamp, inside in data.get("transitions", [])
+            if (at := dt_util.parse_datetime(timestamp))
+        )
+        stats.inside = data.get("inside")
+        stats.since = dt_util.parse_datetime(str(data.get("since")))
+        stats.day = dt_util.parse_date(str(data.get("day")))
+        stats.seconds_inside = float(data.get("seconds_inside", 0))
+        stats.seconds_outside = float(data.get("seconds_outside", 0))
+        stats.trips = int(data.get("trips", 0))
+        stats.last_trip = data.get("last_trip")
+
+        return stats
+
+
+def _location(pet: SurepyEntity) -> tuple[bool, datetime] | None:
+    """Return whether a pet is inside and since when, None if unknown."""
+
+    position = pet.raw_data().get("position") or {}
+
+    # https://github.com/PyCQA/pylint/issues/2062
+    # pylint: disable=no-member
+    if (where := position.get("where")) not in (
+        Location.INSIDE.value,
+        Location.OUTSIDE.value,
+    ):
+        return None
+
+    since = dt_util.parse_datetime(str(position.get("since"))) or dt_util.utcnow()
+
+    return where == Location.INSIDE.value, dt_util.as_utc(since)
+
+
+class PresenceTracker(PersistedState):
+    """Presence stats of the pets of an account, persisted across restarts."""
+
+    key = "presence"
+    description = "presence stats"
+    save_delay = SURE_PRESENCE_SAVE_DELAY
+
+    def __init__(
+        self, hass: HomeAssistant, entry_id: str, history: int = SURE_PRESENCE_HISTORY
+    ) -> None:
+        """Initialize the tracker."""
+
+        self.history = history
+        self.pets: dict[int, PresenceStats] = {}
+
+        super().__init__(hass, entry_id)
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Restore the stats of the last run."""
+        self.pets = {
+            int(pet_id): PresenceStats.from_dict(stats, self.history)
+            for pet_id, stats in data.get("pets", {}).items()
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stats to store."""
+        return {
+            "pets": {str(_id): stats.as_dict() for _id, stats in self.pets.items()}
+        }
+
+    @callback
+    def update(self, entities: dict[int, SurepyEntity], ids: set[int]) -> None:
+        """Record the location changes of the given pets."""
+
+        moved = False
+
+        for _id in ids:
+
+            if (pet := entities.get(_id)) is None or pet.type != EntityType.PET:
+                continue
+
+            if location := _location(pet):
+                stats = self.pets.setdefault(_id, PresenceStats(self.history))
+                moved |= stats.transition(*location)
+
+        if moved:
+            self.async_save()
+
+    def stats(self, pet_id: int) -> PresenceStats | None:
+        """Return the stats of a pet."""
+        return self.pets.get(pet_id)
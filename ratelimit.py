@@ -0,0 +1,223 @@
+"""Rate limit aware scheduling of the Sure Petcare api requests."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from dataclasses import dataclass, field
+from enum import IntEnum
+from http import HTTPStatus
+import itertools
+import logging
+import time
+from typing import Any, TypeVar
+
+# pylint: disable=relative-beyond-top-level
+from .const import (
+    SURE_REQUEST_BURST,
+    SURE_REQUEST_RATE,
+    SURE_REQUEST_RETRIES,
+    SURE_RETRY_AFTER,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """Priority of a request, lower values go first."""
+
+    COMMAND = 0
+    REFRESH = 1
+
+
+@dataclass(order=True)
+class _Request:
+    priority: int
+    seq: int
+    call: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    # 429 responses to this request
+    throttled: int = field(default=0, compare=False)
+
+
+# the request whose call is running in the current task
+_CURRENT: ContextVar[_Request | None] = ContextVar("_CURRENT", default=None)
+
+# the priority of the calls made by the current task, see RequestScheduler.limit
+_PRIORITY: ContextVar[Priority] = ContextVar("_PRIORITY", default=Priority.REFRESH)
+
+
+class RequestScheduler:
+    """Token bucket with a priority queue in front of the api."""
+
+    def __init__(
+        self,
+        rate: float = SURE_REQUEST_RATE,
+        burst: int = SURE_REQUEST_BURST,
+        retries: int = SURE_REQUEST_RETRIES,
+    ) -> None:
+        """Initialize the scheduler."""
+
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+        self._queue: asyncio.PriorityQueue[_Request] = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._worker: asyncio.Task | None = None
+
+        # counters
+        self.queued: int = 0
+        self.throttled: int = 0
+
+    async def async_run(
+        self, call: Callable[[], Awaitable[T]], priority: Priority = Priority.REFRESH
+    ) -> T:
+        """Queue an api call and return its result."""
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._async_work())
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Request(priority, next(self._seq), call, future))
+        self.queued += 1
+
+        return await future
+
+    def limit(
+        self, call: Callable[..., Awaitable[T]]
+    ) -> Callable[..., Awaitable[T]]:
+        """Return the call queued on every invocation, e.g. each api request."""
+
+        @wraps(call)
+        async def limited(*args: Any, **kwargs: Any) -> T:
+
+            # already queued, e.g. a call made by a queued call
+            if _CURRENT.get() is not None:
+                return await call(*args, **kwargs)
+
+            return await self.async_run(
+                lambda: call(*args, **kwargs), _PRIORITY.get()
+            )
+
+        return limited
+
+    @staticmethod
+    @contextmanager
+    def prioritized(priority: Priority) -> Iterator[None]:
+        """Queue the limited calls made inside the block with the given priority."""
+
+        token = _PRIORITY.set(priority)
+        try:
+            yield
+        finally:
+            _PRIORITY.reset(token)
+
+    def stop(self) -> None:
+        """Stop the worker, pending requests are cancelled."""
+
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
+
+        while not self._queue.empty():
+            self._queue.get_nowait().future.cancel()
+
+    @property
+    def pending(self) -> int:
+        """Return the number of waiting requests."""
+        return self._queue.qsize()
+
+    async def _async_take_token(self) -> None:
+
+        while True:
+
+            now = time.monotonic()
+
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def _async_work(self) -> None:
+
+        while True:
+
+            # take the token first, so the most urgent request waiting
+            # at that time is the one which gets it
+            await self._async_take_token()
+
+            while (request := await self._queue.get()).future.done():
+                continue
+
+            asyncio.create_task(self._async_execute(request))
+
+    def observe(self, status: int, headers: Any) -> None:
+        """Pause all requests if the api throttles us."""
+
+        if status != HTTPStatus.TOO_MANY_REQUESTS:
+            return
+
+        try:
+            retry_after = float(headers.get("Retry-After", SURE_RETRY_AFTER))
+        except (TypeError, ValueError):
+            retry_after = float(SURE_RETRY_AFTER)
+
+        self.throttled += 1
+        if (request := _CURRENT.get()) is not None:
+            request.throttled += 1
+
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+        _LOGGER.warning(
+            "🐾 \x1b[38;2;255;26;102m·\x1b[0m throttled by surepetcare.io,"
+            " pausing requests for %.0fs",
+            retry_after,
+        )
+
+    async def _async_execute(self, request: _Request, attempt: int = 0) -> None:
+
+        throttled = request.throttled
+        result: Any = None
+        error: BaseException | None = None
+
+        # each request runs in its own task, so the responses observed meanwhile
+        # in this context are the ones to this request
+        _CURRENT.set(request)
+
+        try:
+            result = await request.call()
+        except Exception as err:  # pylint: disable=broad-except
+            error = err
+
+        # surepy does not raise on a 429, so check whether this request got throttled
+        if request.throttled > throttled and attempt < self.retries:
+            await self._async_take_token()
+            await self._async_execute(request, attempt + 1)
+            return
+
+        if request.future.done():
+            return
+
+        if error:
+            request.future.set_exception(error)
+        else:
+            request.future.set_result(result)
@@ -0,0 +1,90 @@
+"""Single flight, debounced refreshes of an account."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+from typing import Any, TypeVar
+
+# pylint: disable=relative-beyond-top-level
+from .const import SURE_REFRESH_DEBOUNCE
+from .metrics import PerformanceMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _retrieve(future: asyncio.Future) -> None:
+    # nobody may be left waiting for a failed fetch
+    if not future.cancelled():
+        future.exception()
+
+
+class RefreshGate:
+    """Coalesces the refreshes of an account.
+
+    Requests within the debounce window share one refresh and a fetch already
+    running is shared by everything needing the data meanwhile.
+    """
+
+    def __init__(
+        self,
+        metrics: PerformanceMetrics,
+        debounce: float = SURE_REFRESH_DEBOUNCE,
+    ) -> None:
+        """Initialize the gate, debounce window in seconds."""
+
+        self.metrics = metrics
+        self.debounce = debounce
+
+        # the fetch running and the requested refresh waiting for its window
+        self._fetch: asyncio.Future | None = None
+        self._pending: asyncio.Future | None = None
+
+    @property
+    def fetching(self) -> bool:
+        """Return True while a fetch is running."""
+        return self._fetch is not None and not self._fetch.done()
+
+    async def async_fetch(self, fetch: Callable[[], Awaitable[T]]) -> T:
+        """Run a fetch, or join the one already running."""
+
+        if (running := self._fetch) is not None and not running.done():
+            self.metrics.refresh_saved()
+        else:
+            running = self._fetch = asyncio.ensure_future(fetch())
+            running.add_done_callback(_retrieve)
+
+        # a cancelled caller must not cancel the fetch of the others
+        return await asyncio.shield(running)
+
+    async def async_request(self, refresh: Callable[[], Awaitable[Any]]) -> None:
+        """Request a refresh, merged with the other requests of the window."""
+
+        self.metrics.refresh_requested()
+
+        if (pending := self._pending) is not None and not pending.done():
+            self.metrics.refresh_saved()
+        else:
+            pending = self._pending = asyncio.ensure_future(
+                self._async_refresh(refresh)
+            )
+            pending.add_done_callback(_retrieve)
+
+        await asyncio.shield(pending)
+
+    async def _async_refresh(self, refresh: Callable[[], Awaitable[Any]]) -> None:
+
+        await asyncio.sleep(self.debounce)
+
+        # a fetch started before the requests may miss what they ask for
+        while self.fetching:
+            await asyncio.wait({self._fetch})  # type: ignore
+
+        # requests from now on need a refresh of their own
+        self._pending = None
+
+        _LOGGER.debug("🐾 \x1b[38;2;255;26;102m·\x1b[0m running a requested refresh")
+
+        await refresh()
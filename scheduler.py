@@ -0,0 +1,123 @@
+"""Adaptive polling interval for the SureHA coordinator."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from random import uniform
+
+from homeassistant.util import dt as dt_util
+
+# pylint: disable=relative-beyond-top-level
+from .const import (
+    SURE_SCAN_BOOST_DURATION,
+    SURE_SCAN_IDLE_AFTER,
+    SURE_SCAN_INTERVAL,
+    SURE_SCAN_NIGHT_END,
+    SURE_SCAN_NIGHT_START,
+)
+
+
+class AdaptivePollScheduler:
+    """Pick the next polling interval based on the recent activity."""
+
+    def __init__(
+        self,
+        interval_min: timedelta,
+        interval_max: timedelta,
+        interval: timedelta = timedelta(seconds=SURE_SCAN_INTERVAL),
+    ) -> None:
+        """Initialize the scheduler."""
+
+        self.interval_min = interval_min
+        self.interval_max = max(interval_min, interval_max)
+        self.interval = self._clamp(interval)
+
+        self.failures: int = 0
+
+        self._boost_until: datetime | None = None
+        self._last_change: datetime = dt_util.utcnow()
+
+    def _clamp(self, interval: timedelta) -> timedelta:
+        return max(self.interval_min, min(self.interval_max, interval))
+
+    def boost(
+        self, duration: timedelta = timedelta(seconds=SURE_SCAN_BOOST_DURATION)
+    ) -> None:
+        """Poll fast for a while, e.g. after a pet movement or a service call."""
+        self._boost_until = dt_util.utcnow() + duration
+
+    def success(self, changed: bool, activity: bool = False) -> timedelta:
+        """Return the interval to use after a successful refresh."""
+
+        now = dt_util.utcnow()
+        self.failures = 0
+
+        if activity:
+            self.boost()
+
+        if changed:
+            self._last_change = now
+
+        if self._boost_until and now < self._boost_until:
+            return self.interval_min
+
+        hour = dt_util.as_local(now).hour
+        if hour >= SURE_SCAN_NIGHT_START or hour < SURE_SCAN_NIGHT_END:
+            return self.interval_max
+
+        # double the interval for every idle period without any change
+        idle_periods = int(
+            (now - self._last_change) / timedelta(seconds=SURE_SCAN_IDLE_AFTER)
+        )
+
+        return self._clamp(self.interval * 2 ** min(idle_periods, 8))
+
+    def failure(self) -> timedelta:
+        """Return the interval to use after a failed refresh."""
+
+        self.failures += 1
+
+        backoff = self._clamp(self.interval * 2 ** min(self.failures, 8))
+
+        # jitter to not hit the api in lockstep with everyone else
+        return self._clamp(
+            timedelta(
+                seconds=uniform(  # nosec
+                    backoff.total_seconds() / 2, backoff.total_seconds()
+                )
+            )
+        )
+
+
+class PollStagger:
+    """Spread the polls of multiple accounts over the polling interval."""
+
+    def __init__(self) -> None:
+        """Initialize the stagger."""
+        self._next_polls: dict[str, datetime] = {}
+
+    def schedule(self, entry_id: str, interval: timedelta) -> timedelta:
+        """Return the interval moved away from the polls of the other accounts."""
+
+        now = dt_util.utcnow()
+
+        others = sorted(
+            next_poll
+            for other_id, next_poll in self._next_polls.items()
+            if other_id != entry_id and next_poll > now
+        )
+
+        spacing = interval / (len(others) + 1)
+        next_poll = now + interval
+
+        # the polls are sorted, so moving past one never collides with an earlier
+        for other in others:
+            if abs(next_poll - other) < spacing:
+                next_poll = other + spacing
+
+        self._next_polls[entry_id] = next_poll
+
+        return next_poll - now
+
+    def remove(self, entry_id: str) -> None:
+        """Forget an account."""
+        self._next_polls.pop(entry_id, None)
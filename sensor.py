@@ -1,18 +1,27 @@
 """Support for Sure PetCare Flaps/Pets sensors."""
 from __future__ import annotations
 
-from typing import Any, cast
+from typing import Any, Callable, NamedTuple, cast
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    STATE_CLASS_MEASUREMENT,
+    STATE_CLASS_TOTAL_INCREASING,
+    SensorEntity,
+)
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
-    ATTR_VOLTAGE,
+    DATA_BYTES,
     DEVICE_CLASS_BATTERY,
+    DEVICE_CLASS_TIMESTAMP,
+    ENTITY_CATEGORY_DIAGNOSTIC,
     MASS_GRAMS,
     PERCENTAGE,
+    TIME_MILLISECONDS,
+    TIME_MINUTES,
     VOLUME_MILLILITERS,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from surepy.entities import SurepyEntity
 from surepy.entities.devices import (
@@ -30,11 +39,16 @@ from .const import (
     ATTR_VOLTAGE_FULL,
     ATTR_VOLTAGE_LOW,
     DOMAIN,
+    SIGNAL_NEW_ENTITIES,
     SPC,
     SURE_BATT_VOLTAGE_FULL,
     SURE_BATT_VOLTAGE_LOW,
-    SURE_MANUFACTURER,
+    SURE_CONSUMPTION_WINDOW,
 )
+from .devices import account_device_info
+from .index import FLAPS, HUB_DEVICES, EntityIndex
+from .metrics import PerformanceMetrics
+from .presence import PresenceTotals
 
 PARALLEL_UPDATES = 2
 
@@ -54,56 +68,81 @@ async def async_setup_entry(
 ) -> None:
     """Set up config entry Sure PetCare Flaps sensors."""
 
-    entities: list[Flap | Felaqua | Feeder | FeederBowl | Battery] = []
+    spc: SurePetcareAPI = hass.data[DOMAIN][SPC][config_entry.entry_id]
 
-    spc: SurePetcareAPI = hass.data[DOMAIN][SPC]
+    @callback
+    def async_add_new(index: EntityIndex) -> None:
+        """Add the sensors of pets/devices new to the account."""
+        async_add_entities(_entities(spc, config_entry, index))
 
-    for surepy_entity in spc.coordinator.data.values():
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_NEW_ENTITIES.format(config_entry.entry_id), async_add_new
+        )
+    )
+
+    async_add_entities(
+        [
+            *_entities(spc, config_entry, spc.index),
+            *(
+                ApiMetric(spc.coordinator, spc, description)
+                for description in API_METRICS
+            ),
+        ]
+    )
 
-        if surepy_entity.type in [
-            EntityType.CAT_FLAP,
-            EntityType.PET_FLAP,
-        ]:
-            entities.append(Flap(spc.coordinator, surepy_entity.id, spc))
 
-        elif surepy_entity.type == EntityType.FELAQUA:
-            entities.append(Felaqua(spc.coordinator, surepy_entity.id, spc))
+def _entities(
+    spc: SurePetcareAPI, config_entry: ConfigEntry, index: EntityIndex
+) -> list[SurePetcareSensor]:
+    """Return the sensors of the indexed pets and devices."""
 
-        elif surepy_entity.type == EntityType.FEEDER:
+    entities: list[SurePetcareSensor] = []
 
-            for bowl in surepy_entity.bowls.values():
-                entities.append(
-                    FeederBowl(spc.coordinator, surepy_entity.id, spc, bowl.raw_data())
-                )
+    for flap in index.of_type(*FLAPS):
+        entities.append(Flap(spc.coordinator, flap.id, spc))
 
-            entities.append(Feeder(spc.coordinator, surepy_entity.id, spc))
+    for felaqua in index.of_type(EntityType.FELAQUA):
+        entities.append(Felaqua(spc.coordinator, felaqua.id, spc))
+        entities.append(Consumption(spc.coordinator, felaqua.id, spc))
 
-        if surepy_entity.type in [
-            EntityType.CAT_FLAP,
-            EntityType.PET_FLAP,
-            EntityType.FEEDER,
-            EntityType.FELAQUA,
-        ]:
+    for feeder in index.of_type(EntityType.FEEDER):
 
-            voltage_batteries_full = cast(
-                float,
-                config_entry.options.get(ATTR_VOLTAGE_FULL, SURE_BATT_VOLTAGE_FULL),
-            )
-            voltage_batteries_low = cast(
-                float, config_entry.options.get(ATTR_VOLTAGE_LOW, SURE_BATT_VOLTAGE_LOW)
+        for bowl in index.bowls.get(feeder.id, []):
+            entities.append(
+                FeederBowl(spc.coordinator, feeder.id, spc, bowl.raw_data())
             )
+            entities.append(Consumption(spc.coordinator, feeder.id, spc, bowl.index))
 
-            entities.append(
-                Battery(
-                    spc.coordinator,
-                    surepy_entity.id,
-                    spc,
-                    voltage_full=voltage_batteries_full,
-                    voltage_low=voltage_batteries_low,
-                )
+        entities.append(Feeder(spc.coordinator, feeder.id, spc))
+        entities.append(Consumption(spc.coordinator, feeder.id, spc))
+
+    for pet in index.of_type(EntityType.PET):
+        entities.extend(
+            PetPresence(spc.coordinator, pet.id, spc, description)
+            for description in PRESENCE_STATS
+        )
+
+    voltage_batteries_full = cast(
+        float,
+        config_entry.options.get(ATTR_VOLTAGE_FULL, SURE_BATT_VOLTAGE_FULL),
+    )
+    voltage_batteries_low = cast(
+        float, config_entry.options.get(ATTR_VOLTAGE_LOW, SURE_BATT_VOLTAGE_LOW)
+    )
+
+    for device in index.of_type(*HUB_DEVICES):
+        entities.append(
+            Battery(
+                spc.health,
+                device.id,
+                spc,
+                voltage_full=voltage_batteries_full,
+                voltage_low=voltage_batteries_low,
             )
+        )
 
-    async_add_entities(entities)
+    return entities
 
 
 class SurePetcareSensor(CoordinatorEntity, SensorEntity):
@@ -118,6 +157,9 @@ class SurePetcareSensor(CoordinatorEntity, SensorEntity):
         self._id = _id
         self._spc: SurePetcareAPI = spc
 
+        # id of the surepy entity this entity gets its data from
+        self._surepy_id: int = _id
+
         self._coordinator = coordinator
 
         self._surepy_entity: SurepyEntity = self._coordinator.data[_id]
@@ -127,7 +169,7 @@ class SurePetcareSensor(CoordinatorEntity, SensorEntity):
         self._attr_unique_id = f"{self._surepy_entity.household_id}-{self._id}"
 
         self._attr_extra_state_attributes = (
-            {**self._surepy_entity.raw_data()} if self._state else {}
+            self._spc.attributes(self._surepy_entity) if self._state else {}
         )
 
         self._attr_name: str = (
@@ -135,46 +177,33 @@ class SurePetcareSensor(CoordinatorEntity, SensorEntity):
             f"{self._surepy_entity.name.capitalize()}"
         )
 
-    @property
-    def device_info(self):
-
-        device = {}
-
-        try:
-
-            model = f"{self._surepy_entity.type.name.replace('_', ' ').title()}"
-            if serial := self._surepy_entity.raw_data().get("serial_number"):
-                model = f"{model} ({serial})"
-            elif mac_address := self._surepy_entity.raw_data().get("mac_address"):
-                model = f"{model} ({mac_address})"
-            elif tag_id := self._surepy_entity.raw_data().get("tag_id"):
-                model = f"{model} ({tag_id})"
-
-            device = {
-                "identifiers": {(DOMAIN, self._id)},
-                "name": self._surepy_entity.name.capitalize(),
-                "manufacturer": SURE_MANUFACTURER,
-                "model": model,
-            }
-
-            if self._state:
-                versions = self._state.get("version", {})
-
-                if dev_fw_version := versions.get("device", {}).get("firmware"):
-                    device["sw_version"] = dev_fw_version
-
-                if (lcd_version := versions.get("lcd", {})) and (
-                    rf_version := versions.get("rf", {})
-                ):
-                    device["sw_version"] = (
-                        f"lcd: {lcd_version.get('version', lcd_version)['firmware']} | "
-                        f"fw: {rf_version.get('version', rf_version)['firmware']}"
-                    )
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if the surepy entity changed."""
+        # entities of a vanished pet/device wait for their removal
+        if (
+            self._surepy_id in self._spc.changed_ids_of(self.coordinator)
+            and self._surepy_id in self.coordinator.data
+        ):
+            self._spc.metrics.state_written()
+            super()._handle_coordinator_update()
 
-        except AttributeError:
-            pass
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the attributes, marked if the data is stale."""
+        return {
+            **(getattr(self, "_attr_extra_state_attributes", None) or {}),
+            **self._spc.stale_attributes,
+        }
 
-        return device
+    @property
+    def device_info(self):
+        """Return the device info, shared by all entities of a device."""
+        # the current data, e.g. with a new firmware version
+        surepy_entity = self._coordinator.data.get(self._surepy_id, self._surepy_entity)
+        return self._spc.devices.device_info(
+            self._id, surepy_entity, surepy_entity.raw_data().get("status")
+        )
 
 
 class Flap(SurePetcareSensor):
@@ -191,7 +220,7 @@ class Flap(SurePetcareSensor):
         if self._state:
             self._attr_extra_state_attributes = {
                 "learn_mode": bool(self._state["learn_mode"]),
-                **self._surepy_entity.raw_data(),
+                **self._spc.attributes(self._surepy_entity),
             }
 
             if locking := self._state.get("locking"):
@@ -265,6 +294,14 @@ class FeederBowl(SurePetcareSensor):
         )
         self._attr_unit_of_measurement = MASS_GRAMS
 
+    @property
+    def device_info(self):
+        """Return the device info of the bowl."""
+        # the bowls have no status of their own
+        return self._spc.devices.device_info(
+            self._id, self._surepy_entity, self._state
+        )
+
     @property
     def state(self) -> float | None:
         """Return the remaining water."""
@@ -293,6 +330,69 @@ class Feeder(SurePetcareSensor):
             return int(feeder.total_weight) if feeder.total_weight else None
 
 
+class Consumption(SurePetcareSensor):
+    """Food or water consumed today from a feeder (bowl) or a felaqua."""
+
+    def __init__(
+        self, coordinator, _id: int, spc: SurePetcareAPI, bowl: int | None = None
+    ):
+        super().__init__(coordinator, _id, spc)
+
+        self.bowl = bowl
+
+        if bowl is not None:
+            self._attr_name = f"{self._attr_name} Bowl {bowl}"
+            self._attr_unique_id = f"{self._attr_unique_id}-{bowl}"
+
+        self._attr_name = f"{self._attr_name} Consumed Today"
+        self._attr_unique_id = f"{self._attr_unique_id}-consumption"
+        self._attr_state_class = STATE_CLASS_TOTAL_INCREASING
+        self._attr_unit_of_measurement = (
+            VOLUME_MILLILITERS
+            if self._surepy_entity.type == EntityType.FELAQUA
+            else MASS_GRAMS
+        )
+
+        # home assistant writes this state when adding the entity
+        self._written: Any = self._totals()
+
+    def _totals(self) -> tuple[int, int, int]:
+        totals = self._spc.consumption.totals(self._id, self.bowl)
+        return round(totals.today), round(totals.window), totals.refills
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state if the device changed or the totals rolled over."""
+
+        if self._surepy_id not in self.coordinator.data:
+            return
+
+        if (
+            self._surepy_id in self._spc.changed_ids
+            or self._totals() != self._written
+        ):
+            self._written = self._totals()
+            self._spc.metrics.state_written()
+            self.async_write_ha_state()
+
+    @property
+    def state(self) -> int:
+        """Return the consumption of today."""
+        return round(self._spc.consumption.totals(self._id, self.bowl).today)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the consumption of the rolling window and the refills."""
+
+        totals = self._spc.consumption.totals(self._id, self.bowl)
+
+        return {
+            f"last_{SURE_CONSUMPTION_WINDOW}_hours": round(totals.window),
+            "refills_today": totals.refills,
+            **self._spc.stale_attributes,
+        }
+
+
 class Battery(SurePetcareSensor):
     """Sure Petcare Flap."""
 
@@ -326,12 +426,11 @@ class Battery(SurePetcareSensor):
         if battery := cast(SurepyDevice, self._coordinator.data[self._id]):
 
             self._surepy_entity = battery
-            battery_level = battery.calculate_battery_level(
-                voltage_full=self.voltage_full, voltage_low=self.voltage_low
-            )
 
             # return batterie level between 0 and 100
-            return battery_level
+            return self._spc.derived.battery(
+                battery, voltage_full=self.voltage_full, voltage_low=self.voltage_low
+            ).level
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
@@ -339,17 +438,223 @@ class Battery(SurePetcareSensor):
 
         attrs = {}
 
-        if (device := cast(SurepyDevice, self._coordinator.data[self._id])) and (
-            state := device.raw_data().get("status")
-        ):
+        if device := cast(SurepyDevice, self._coordinator.data[self._id]):
+
             self._surepy_entity = device
 
-            voltage = float(state["battery"])
+            attrs = self._spc.derived.battery(
+                device, voltage_full=self.voltage_full, voltage_low=self.voltage_low
+            ).attributes
 
-            attrs = {
-                "battery_level": device.battery_level,
-                ATTR_VOLTAGE: f"{voltage:.2f}",
-                f"{ATTR_VOLTAGE}_per_battery": f"{voltage / 4:.2f}",
-            }
+            if (
+                days := self._spc.batteries.days_remaining(
+                    self._id,
+                    voltage_low=self.voltage_low,
+                    voltage_full=self.voltage_full,
+                )
+            ) is not None:
+                attrs = {**attrs, "days_remaining": round(days, 1)}
+
+        return {**attrs, **self._spc.stale_attributes}
+
+
+def _minutes(seconds: float | None) -> int | None:
+    return round(seconds / 60) if seconds is not None else None
+
+
+class PresenceStatDescription(NamedTuple):
+    """Presence stat of a pet exposed as sensor."""
+
+    key: str
+    name: str
+    value: Callable[[PresenceTotals], Any]
+    unit: str | None = TIME_MINUTES
+
+
+PRESENCE_STATS = [
+    PresenceStatDescription(
+        "time_inside", "Time Inside Today", lambda totals: _minutes(totals.inside)
+    ),
+    PresenceStatDescription(
+        "time_outside", "Time Outside Today", lambda totals: _minutes(totals.outside)
+    ),
+    PresenceStatDescription("trips", "Trips Today", lambda totals: totals.trips, None),
+    PresenceStatDescription(
+        "last_trip", "Last Trip", lambda totals: _minutes(totals.last_trip)
+    ),
+]
+
+
+class PetPresence(SurePetcareSensor):
+    """Time inside/outside and trips of a pet today."""
+
+    def __init__(
+        self,
+        coordinator,
+        _id: int,
+        spc: SurePetcareAPI,
+        description: PresenceStatDescription,
+    ):
+        super().__init__(coordinator, _id, spc)
+
+        self._description = description
+
+        self._attr_name = f"{self._attr_name} {description.name}"
+        self._attr_unique_id = f"{self._attr_unique_id}-{description.key}"
+        self._attr_unit_of_measurement = description.unit
+        self._attr_extra_state_attributes = {}
+
+        # home assistant writes this state when adding the entity
+        self._written: Any = self.state
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state if the pet moved or the value changed."""
+
+        if self._surepy_id not in self.coordinator.data:
+            return
+
+        if self._surepy_id in self._spc.changed_ids or self.state != self._written:
+            self._written = self.state
+            self._spc.metrics.state_written()
+            self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """Return true if the location of the pet is known."""
+        return self._spc.presence.stats(self._id) is not None
+
+    @property
+    def state(self) -> Any:
+        """Return the stat of today."""
+
+        if stats := self._spc.presence.stats(self._id):
+            return self._description.value(stats.totals())
+
+        return None
+
+
+def _milliseconds(seconds: float | None) -> int | None:
+    return round(seconds * 1000) if seconds is not None else None
+
+
+class ApiMetricDescription(NamedTuple):
+    """Performance metric of an account exposed as diagnostic sensor."""
+
+    key: str
+    name: str
+    value: Callable[[PerformanceMetrics], Any]
+    unit: str | None = None
+    device_class: str | None = None
+    state_class: str | None = STATE_CLASS_MEASUREMENT
+    attributes: Callable[[PerformanceMetrics], dict[str, Any]] | None = None
+
+
+API_METRICS = [
+    ApiMetricDescription(
+        "refresh_duration",
+        "Refresh Duration",
+        lambda metrics: _milliseconds(metrics.refresh_duration),
+        unit=TIME_MILLISECONDS,
+    ),
+    ApiMetricDescription(
+        "api_latency",
+        "API Latency",
+        lambda metrics: _milliseconds(metrics.latency_avg),
+        unit=TIME_MILLISECONDS,
+        attributes=lambda metrics: {
+            name: _milliseconds(endpoint.latency_avg)
+            for name, endpoint in sorted(metrics.endpoints.items())
+        },
+    ),
+    ApiMetricDescription(
+        "payload",
+        "API Payload",
+        lambda metrics: metrics.payload_bytes,
+        unit=DATA_BYTES,
+        state_class=STATE_CLASS_TOTAL_INCREASING,
+    ),
+    ApiMetricDescription(
+        "entity_count", "Entities", lambda metrics: metrics.entity_count
+    ),
+    ApiMetricDescription(
+        "refreshes",
+        "Refreshes",
+        lambda metrics: metrics.refreshes,
+        state_class=STATE_CLASS_TOTAL_INCREASING,
+    ),
+    ApiMetricDescription(
+        "refreshes_saved",
+        "Saved Refreshes",
+        lambda metrics: metrics.refreshes_saved,
+        state_class=STATE_CLASS_TOTAL_INCREASING,
+        attributes=lambda metrics: {"requested": metrics.refresh_requests},
+    ),
+    ApiMetricDescription(
+        "failures",
+        "Failed Refreshes",
+        lambda metrics: metrics.failures,
+        state_class=STATE_CLASS_TOTAL_INCREASING,
+    ),
+    ApiMetricDescription(
+        "last_success",
+        "Last Successful Refresh",
+        lambda metrics: metrics.last_success.isoformat()
+        if metrics.last_success
+        else None,
+        device_class=DEVICE_CLASS_TIMESTAMP,
+        state_class=None,
+    ),
+    ApiMetricDescription(
+        "state_writes",
+        "State Writes per Refresh",
+        lambda metrics: metrics.state_writes,
+    ),
+]
+
+
+class ApiMetric(CoordinatorEntity, SensorEntity):
+    """Performance metric of the connection of an account to surepetcare.io."""
+
+    _attr_should_poll = False
+    _attr_entity_category = ENTITY_CATEGORY_DIAGNOSTIC
+
+    def __init__(
+        self, coordinator, spc: SurePetcareAPI, description: ApiMetricDescription
+    ):
+        """Initialize a metric sensor."""
+        super().__init__(coordinator)
+
+        self._spc: SurePetcareAPI = spc
+        self._description = description
+
+        self._attr_name = f"{spc.config_entry.title} {description.name}"
+        self._attr_unique_id = f"{spc.config_entry.entry_id}-{description.key}"
+        self._attr_unit_of_measurement = description.unit
+        self._attr_device_class = description.device_class
+        self._attr_state_class = description.state_class
+        self._attr_device_info = account_device_info(spc.config_entry)
+
+    @property
+    def available(self) -> bool:
+        """Return True, the metrics are most interesting if the api fails."""
+        return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state after all other entities, to count their writes."""
+        self.hass.loop.call_soon(self.async_write_ha_state)
+
+    @property
+    def state(self) -> Any:
+        """Return the current value of the metric."""
+        return self._description.value(self._spc.metrics)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the details of the metric."""
+
+        if self._description.attributes:
+            return self._description.attributes(self._spc.metrics)
 
-        return attrs
+        return None
@@ -0,0 +1,71 @@
+"""Shared http session which reports the api responses to the accounts."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from aiohttp import ClientSession, TraceConfig, TraceRequestEndParams
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+# callback(url, status, response headers, latency in seconds)
+ResponseCallback = Callable[[str, int, Any, float], None]
+
+
+class ResponseObservers:
+    """Route the responses of the shared session to the account they belong to."""
+
+    def __init__(self) -> None:
+        """Initialize the observers."""
+        self._observers: dict[
+            int, tuple[Callable[[], str | None], ResponseCallback]
+        ] = {}
+
+    def add(
+        self, token: Callable[[], str | None], callback: ResponseCallback
+    ) -> Callable[[], None]:
+        """Observe the responses to the requests made with a token."""
+
+        key = id(callback)
+        self._observers[key] = (token, callback)
+
+        return lambda: self._observers.pop(key, None)  # type: ignore
+
+    def create_session(self, hass: HomeAssistant) -> ClientSession:
+        """Create the http session shared by all accounts."""
+
+        trace_config = TraceConfig()
+        trace_config.on_request_start.append(self._async_on_request_start)
+        trace_config.on_request_end.append(self._async_on_request_end)
+
+        return async_create_clientsession(hass, trace_configs=[trace_config])
+
+    async def _async_on_request_start(
+        self, _: ClientSession, context: SimpleNamespace, __: Any
+    ) -> None:
+        context.start = time.monotonic()
+
+    async def _async_on_request_end(
+        self,
+        _: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestEndParams,
+    ) -> None:
+
+        # surepy sends a preflight before every call, only count the calls
+        if params.method == "OPTIONS":
+            return
+
+        latency = time.monotonic() - getattr(context, "start", time.monotonic())
+        authorization = params.headers.get("Authorization")
+
+        for token, callback in list(self._observers.values()):
+            if authorization == f"Bearer {token()}":
+                callback(
+                    str(params.url),
+                    params.response.status,
+                    params.response.headers,
+                    latency,
+                )
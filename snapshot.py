@@ -0,0 +1,108 @@
+"""Persisted snapshot of the surepy entities to start without the cloud."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from surepy.entities import SurepyEntity
+from surepy.entities.devices import Feeder, Felaqua, Flap, Hub
+from surepy.entities.pet import Pet
+from surepy.enums import EntityType
+
+# pylint: disable=relative-beyond-top-level
+from .const import DOMAIN, SURE_SNAPSHOT_MAX_AGE, SURE_SNAPSHOT_SAVE_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+ENTITY_CLASSES: dict[EntityType, type[SurepyEntity]] = {
+    EntityType.CAT_FLAP: Flap,
+    EntityType.PET_FLAP: Flap,
+    EntityType.FEEDER: Feeder,
+    EntityType.FEEDER_LITE: Feeder,
+    EntityType.FELAQUA: Felaqua,
+    EntityType.HUB: Hub,
+    EntityType.PET: Pet,
+}
+
+
+def entities_from_raw(raw_entities: list[dict[str, Any]]) -> dict[int, SurepyEntity]:
+    """Build the surepy entities from their raw data, like surepy does."""
+
+    entities: dict[int, SurepyEntity] = {}
+
+    for raw_data in raw_entities:
+        entity_type = EntityType(int(raw_data.get("product_id", 0)))
+        if entity_class := ENTITY_CLASSES.get(entity_type):
+            entity = entity_class(data=raw_data)  # type: ignore
+            entities[entity.id] = entity
+
+    return entities
+
+
+class SnapshotStore:
+    """Last good coordinator data of an account."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        max_age: timedelta = timedelta(seconds=SURE_SNAPSHOT_MAX_AGE),
+    ) -> None:
+        """Initialize the snapshot store."""
+
+        self.max_age = max_age
+        # time the loaded snapshot was saved
+        self.saved_at: datetime | None = None
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+
+    async def async_load(self) -> dict[int, SurepyEntity] | None:
+        """Return the entities of the snapshot, None if there is no fresh one."""
+
+        try:
+            snapshot = await self._store.async_load()
+        except NotImplementedError:
+            # snapshot of an older storage version
+            return None
+
+        if not isinstance(snapshot, dict) or not (
+            saved_at := dt_util.parse_datetime(str(snapshot.get("saved_at")))
+        ):
+            return None
+
+        if (age := dt_util.utcnow() - saved_at) > self.max_age:
+            _LOGGER.debug(
+                "🐾 \x1b[38;2;255;26;102m·\x1b[0m ignoring snapshot, too old: %s", age
+            )
+            return None
+
+        self.saved_at = saved_at
+
+        try:
+            return entities_from_raw(snapshot["entities"]) or None
+        except (KeyError, TypeError, ValueError) as error:
+            _LOGGER.debug(
+                "🐾 \x1b[38;2;255;26;102m·\x1b[0m ignoring broken snapshot: %s", error
+            )
+            return None
+
+    @callback
+    def async_save(self, entities: dict[int, SurepyEntity]) -> None:
+        """Save the entities after a short delay."""
+
+        self._store.async_delay_save(
+            lambda: {
+                "saved_at": dt_util.utcnow().isoformat(),
+                "entities": [entity.raw_data() for entity in entities.values()],
+            },
+            SURE_SNAPSHOT_SAVE_DELAY,
+        )
+
+    async def async_remove(self) -> None:
+        """Remove the snapshot."""
+        await self._store.async_remove()
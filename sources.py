@@ -0,0 +1,193 @@
+"""Data sources pushing updates of the surepy entities, e.g. a local hub."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+# pylint: disable=relative-beyond-top-level
+from .const import SURE_LOCAL_ACTIVE_WINDOW
+
+_LOGGER = logging.getLogger(__name__)
+
+# changes the raw data of a surepy entity in place
+Update = Callable[[Dict[str, Any]], None]
+# applies an update to the cached surepy entity with the given id
+Apply = Callable[[int, Update], bool]
+# subscribes a callback(topic, payload) to a topic, returns the unsubscribe
+Subscribe = Callable[[str, Callable[[str, Any], None]], Awaitable[Callable[[], None]]]
+
+KINDS = ("pet", "device")
+
+
+def merge(raw_data: dict[str, Any], update: dict[str, Any]) -> None:
+    """Merge a (partial) raw data update into the raw data of an entity."""
+
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(raw_data.get(key), dict):
+            merge(raw_data[key], value)
+        else:
+            raw_data[key] = value
+
+
+class PushSource:
+    """Source pushing updates of the cached surepy entities.
+
+    The cloud stays the source of the entities themselves (names, households,
+    ...), a push source only keeps their data up to date in between the polls.
+    """
+
+    name = "push"
+
+    def __init__(
+        self, active_window: timedelta = timedelta(seconds=SURE_LOCAL_ACTIVE_WINDOW)
+    ) -> None:
+        """Initialize the source."""
+
+        self.active_window = active_window
+
+        self.messages: int = 0
+        self.ignored: int = 0
+        self.last_message: datetime | None = None
+
+        self._apply: Apply | None = None
+
+    @property
+    def active(self) -> bool:
+        """Return True if the source recently pushed something."""
+        return bool(
+            self.last_message
+            and dt_util.utcnow() - self.last_message < self.active_window
+        )
+
+    async def async_start(self, apply: Apply) -> bool:
+        """Start pushing the updates to apply, return False if not possible."""
+        self._apply = apply
+        return True
+
+    def stop(self) -> None:
+        """Stop pushing updates."""
+        self._apply = None
+
+    @callback
+    def push(self, _id: int, update: Update) -> None:
+        """Apply an update received by the source."""
+
+        if self._apply is None or not self._apply(_id, update):
+            self.ignored += 1
+            return
+
+        self.messages += 1
+        self.last_message = dt_util.utcnow()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the source for the diagnostics download."""
+        return {
+            "active": self.active,
+            "messages": self.messages,
+            "ignored": self.ignored,
+            "last_message": self.last_message.isoformat()
+            if self.last_message
+            else None,
+        }
+
+
+async def _async_mqtt_subscribe(
+    hass: HomeAssistant, topic: str, received: Callable[[str, Any], None]
+) -> Callable[[], None]:
+    """Subscribe via the mqtt integration of home assistant."""
+
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components import mqtt
+
+    @callback
+    def message_received(msg: Any) -> None:
+        received(msg.topic, msg.payload)
+
+    return await mqtt.async_subscribe(hass, topic, message_received)
+
+
+class MqttHubSource(PushSource):
+    """Hub messages of a local bridge, published to an mqtt broker.
+
+    The bridge publishes (partial) raw data in the format of the cloud api as
+    json to <topic>/pet/<id> and <topic>/device/<id>, e.g.
+    sureha/pet/31337 {"position": {"where": 1, "since": "2021-...Z"}}.
+    """
+
+    name = "mqtt"
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        topic: str,
+        subscribe: Subscribe | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the source, subscribe defaults to the mqtt integration."""
+        super().__init__(**kwargs)
+
+        self.hass = hass
+        self.topic = topic.strip("/")
+
+        self._subscribe: Subscribe = subscribe or (
+            lambda topic, received: _async_mqtt_subscribe(hass, topic, received)
+        )
+        self._unsubscribe: Callable[[], None] | None = None
+
+    async def async_start(self, apply: Apply) -> bool:
+        """Subscribe to the messages of the bridge."""
+
+        # retained messages arrive right with the subscription
+        await super().async_start(apply)
+
+        try:
+            self._unsubscribe = await self._subscribe(
+                f"{self.topic}/+/+", self._message_received
+            )
+        except (HomeAssistantError, ImportError, KeyError) as error:
+            _LOGGER.error(
+                "🐾 \x1b[38;2;255;26;102m·\x1b[0m unable to subscribe to %s/#, is mqtt set up? %s",
+                self.topic,
+                error,
+            )
+            super().stop()
+            return False
+
+        _LOGGER.info(
+            "🐾 \x1b[38;2;255;26;102m·\x1b[0m listening to the local hub on %s/#",
+            self.topic,
+        )
+
+        return True
+
+    def stop(self) -> None:
+        """Unsubscribe."""
+
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+        super().stop()
+
+    @callback
+    def _message_received(self, topic: str, payload: Any) -> None:
+
+        kind, _, _id = topic[len(self.topic) + 1 :].partition("/")
+
+        try:
+            update = json.loads(payload)
+            if kind not in KINDS or not isinstance(update, dict):
+                raise ValueError(f"unexpected message on {topic}")
+            entity_id = int(_id)
+        except ValueError as error:
+            _LOGGER.debug("🐾 \x1b[38;2;255;26;102m·\x1b[0m %s", error)
+            self.ignored += 1
+            return
+
+        self.push(entity_id, lambda raw_data: merge(raw_data, update))
@@ -0,0 +1,57 @@
+"""State of an account persisted across restarts."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+# pylint: disable=relative-beyond-top-level
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+class PersistedState:
+    """State stored per config entry, e.g. the stats of the trackers."""
+
+    # suffix of the storage key, a description for the logs and the save delay
+    key: str
+    description: str
+    save_delay: int
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.{self.key}")
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Restore the state from the stored data."""
+        raise NotImplementedError
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state to store."""
+        raise NotImplementedError
+
+    async def async_load(self) -> None:
+        """Restore the state of the last run, a broken one is ignored."""
+
+        try:
+            self.restore(await self._store.async_load() or {})
+        except (AttributeError, NotImplementedError, TypeError, ValueError) as error:
+            _LOGGER.debug(
+                "🐾 \x1b[38;2;255;26;102m·\x1b[0m ignoring broken %s: %s",
+                self.description,
+                error,
+            )
+
+    @callback
+    def async_save(self) -> None:
+        """Save the state after the save delay."""
+        self._store.async_delay_save(self.as_dict, self.save_delay)
+
+    async def async_remove(self) -> None:
+        """Remove the persisted state."""
+        await self._store.async_remove()
@@ -0,0 +1,190 @@
+"""Incremental polling of the Sure Petcare household timeline."""
+from __future__ import annotations
+
+from copy import deepcopy
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+from surepy import Surepy
+import surepy.const as surepy_const
+from surepy.entities import SurepyEntity
+from surepy.enums import EntityType, Location
+
+# pylint: disable=relative-beyond-top-level
+from .const import (
+    SURE_FULL_SYNC_INTERVAL,
+    SURE_TIMELINE_MOVEMENT,
+    SURE_TIMELINE_PAGE_SIZE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TimelineSync:
+    """Keep the surepy entities up to date from the household timelines."""
+
+    def __init__(
+        self,
+        surepy: Surepy,
+        full_sync_interval: timedelta = timedelta(seconds=SURE_FULL_SYNC_INTERVAL),
+    ) -> None:
+        """Initialize the timeline sync."""
+
+        self.surepy = surepy
+        self.full_sync_interval = full_sync_interval
+
+        # id of the last applied event per household
+        self.cursors: dict[int, int] = {}
+        self.last_full_sync: datetime | None = None
+
+    def invalidate(self) -> None:
+        """Force a full resync with the next update."""
+        self.cursors = {}
+        self.last_full_sync = None
+
+    async def async_update(
+        self, entities: dict[int, SurepyEntity] | None
+    ) -> dict[int, SurepyEntity]:
+        """Return the updated entities, via the timeline if possible."""
+
+        if (
+            entities
+            and self.cursors
+            and self.last_full_sync
+            and dt_util.utcnow() - self.last_full_sync < self.full_sync_interval
+            and await self._async_apply_events(entities)
+        ):
+            return entities
+
+        return await self.async_full_sync()
+
+    async def async_full_sync(self) -> dict[int, SurepyEntity]:
+        """Fetch the whole household(s) and reset the cursors."""
+
+        self.invalidate()
+
+        # surepy only ever adds to its entities, start over to notice removed ones
+        self.surepy.entities = {}
+
+        entities: dict[int, SurepyEntity] = await self.surepy.get_entities(
+            refresh=True
+        )
+
+        # surepy returns nothing if the etag matched (304), rebuild the entities
+        # from the cached response then, the current ones may have been changed
+        # in place (optimistic updates, timeline events, pushes)
+        if not entities and surepy_const.MESTART_RESOURCE in self.surepy.sac.resources:
+            _LOGGER.debug("🐾 \x1b[38;2;255;26;102m·\x1b[0m household unchanged")
+            entities = await self.surepy.get_entities(refresh=False)
+
+        # the entities share their raw data with the cached response, keep the
+        # cache as the api sent it
+        resources = self.surepy.sac.resources
+        if (cached := resources.get(surepy_const.MESTART_RESOURCE)) is not None:
+            resources[surepy_const.MESTART_RESOURCE] = deepcopy(cached)
+
+        for household_id in {entity.household_id for entity in entities.values()}:
+            if (events := await self._async_fetch_events(household_id)) is not None:
+                self.cursors[household_id] = max(
+                    (int(event["id"]) for event in events), default=0
+                )
+
+        self.last_full_sync = dt_util.utcnow()
+
+        return entities
+
+    async def _async_fetch_events(
+        self, household_id: int, since_id: int | None = None
+    ) -> list[dict[str, Any]] | None:
+        """Fetch the newest timeline events of a household."""
+
+        resource = f"{surepy_const.BASE_RESOURCE}/timeline/household/{household_id}"
+        if since_id:
+            resource = f"{resource}?since_id={since_id}"
+
+        response = await self.surepy.sac.call(method="GET", resource=resource)
+
+        # a 304 (etag matched, nothing new) returns nothing, use the cached response
+        response = response or self.surepy.sac.resources.get(resource)
+
+        if not isinstance(response, dict) or not isinstance(
+            events := response.get("data"), list
+        ):
+            return None
+
+        return events
+
+    async def _async_apply_events(self, entities: dict[int, SurepyEntity]) -> bool:
+        """Apply the new events, return False if a full sync is needed instead."""
+
+        for household_id, cursor in self.cursors.items():
+
+            if (events := await self._async_fetch_events(household_id, cursor)) is None:
+                return False
+
+            new_events = sorted(
+                (event for event in events if int(event["id"]) > cursor),
+                key=lambda event: int(event["id"]),
+            )
+
+            # a full page of unseen events may hide even more
+            if len(new_events) >= SURE_TIMELINE_PAGE_SIZE:
+                return False
+
+            for event in new_events:
+                if not _apply_event(entities, event):
+                    _LOGGER.debug(
+                        "🐾 \x1b[38;2;255;26;102m·\x1b[0m timeline event %s (type %s)"
+                        " needs a full sync",
+                        event.get("id"),
+                        event.get("type"),
+                    )
+                    return False
+
+                self.cursors[household_id] = int(event["id"])
+
+        return True
+
+
+def _apply_event(entities: dict[int, SurepyEntity], event: dict[str, Any]) -> bool:
+    """Apply a timeline event to the entities, return False if not possible."""
+
+    if event.get("type") != SURE_TIMELINE_MOVEMENT:
+        return False
+
+    pets = {
+        entity.raw_data().get("tag_id"): entity
+        for entity in entities.values()
+        if entity.type == EntityType.PET
+    }
+
+    for movement in event.get("movements", []):
+
+        if (pet := pets.get(movement.get("tag_id"))) is None:
+            return False
+
+        # pets only looking through the flap do not change their location
+        # https://github.com/PyCQA/pylint/issues/2062
+        # pylint: disable=no-member
+        if (where := movement.get("direction")) not in (
+            Location.INSIDE.value,
+            Location.OUTSIDE.value,
+        ):
+            continue
+
+        position = {
+            "tag_id": movement.get("tag_id"),
+            "device_id": movement.get("device_id"),
+            "where": where,
+            "since": movement.get("time", event.get("created_at")),
+        }
+
+        raw_data = pet.raw_data()
+        raw_data["position"] = position
+
+        if (status := raw_data.get("status")) and "activity" in status:
+            status["activity"] = position
+
+    return True